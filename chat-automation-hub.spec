@@ -31,6 +31,8 @@ a = Analysis(
         'click',
         'itsdangerous',
         'markupsafe',
+        'waitress',
+        'flask_compress',
         # APScheduler 相关
         'apscheduler',
         'apscheduler.jobstores.base',
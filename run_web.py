@@ -2,7 +2,8 @@
 启动 Web 管理界面
 
 使用方法：
-    python run_web.py
+    python run_web.py          # waitress 多线程服务器
+    python run_web.py --dev    # Flask 开发服务器（调试模式）
 
 访问地址：
     本地：http://localhost:5000
@@ -15,7 +16,7 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from web.app import create_app
+from web.app import create_app, run_server
 
 
 def clear_log_file():
@@ -44,6 +45,6 @@ if __name__ == "__main__":
     print()
     
     app = create_app()
-    # 允许远程访问，开启调试模式查看详细错误
-    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
+    # 允许远程访问；--dev 时开启调试模式查看详细错误
+    run_server(app, dev="--dev" in sys.argv)
 
@@ -2,40 +2,89 @@
 
 使用前提：目标群的聊天窗口需要提前作为独立窗口打开（在微信中双击聊天）
 """
+import ctypes
 import io
+import json
 import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
-import pyperclip
 import uiautomation as auto
 
+# 剪贴板/图片依赖在模块加载时导入一次，避免首次发送时在热路径上付出导入开销
+try:
+    import win32clipboard
+except ImportError:  # 非 Windows 环境（如 DRY_RUN 调试）
+    win32clipboard = None
+
+try:
+    from PIL import Image, ImageGrab
+except ImportError:
+    Image = ImageGrab = None
+
 from src.core.config import load_config
-from src.core.dedupe import should_send, mark_sent
+from src.core.dedupe import should_send_batch, mark_sent, mark_sent_many
 from src.core.log import Logger
-from src.core.ratelimit import get_rate_limiter, reset_rate_limiter
+from src.core.ratelimit import reset_rate_limiter
 from src.core.retry import retry
 
 # 输出目录
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "output"
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 log = Logger("wechat_adapter")
 
+# 发送流程各步骤后的默认等待（秒），可被校准文件覆盖
+DEFAULT_DELAYS: Dict[str, float] = {
+    "after_focus": 0.2,        # SetFocus 之后
+    "after_click": 0.2,        # 点击输入框之后
+    "after_image_paste": 0.3,  # 粘贴图片之后
+    "after_image_send": 0.5,   # 发送图片之后
+    "after_text_paste": 0.2,   # 粘贴文本之后
+    "after_text_send": 0.3,    # 发送文本之后
+}
+
+# 校准结果文件（由 WeChatBroadcaster.calibrate 生成）
+DELAYS_FILE = OUTPUT_DIR / "delays.json"
+
+# 窗口名末尾的未读消息数，如 "家人们(5)"
+_UNREAD_SUFFIX_RE = re.compile(r'\(\d+\)$')
+
+# 剪贴板数据预处理线程：只做图片解码/编码，不触碰 UI（UIA 调用仍在发送线程）
+_prep_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipboard_prep")
+
+# 最近一次由本模块写入剪贴板的内容标识，以及写入后的剪贴板序列号
+# 序列号未变化说明期间没有其他程序改动剪贴板，可直接复用
+_clipboard_state: Dict[str, Any] = {"key": None, "seq": None}
 
-def _safe_sleep(min_sec: float = 0.1, max_sec: float = 0.4):
-    """随机延迟"""
-    time.sleep(random.uniform(min_sec, max_sec))
 
+# 输入锁：聚焦窗口、写剪贴板、模拟按键是全局操作，多个发送线程必须串行
+_input_lock = threading.Lock()
 
-def _copy_image_to_clipboard(image_path: Path) -> bool:
-    """将图片复制到 Windows 剪贴板"""
+# 随机延迟使用的独立随机数生成器
+_rng = random.Random()
+
+
+def _prep_clipboard(image_path: Optional[Path]) -> Optional[bytes]:
+    """
+    预先将图片编码为 CF_DIB 数据（无 UI 线程要求，可在工作线程执行）
+    
+    Returns:
+        DIB 数据，无图片或编码失败返回 None
+    """
+    if not image_path or not image_path.exists():
+        return None
+    
+    if Image is None:
+        log.error("未安装 Pillow，无法处理图片")
+        return None
+    
     try:
-        import win32clipboard
-        from PIL import Image
-        
         img = Image.open(image_path)
         if img.mode != 'RGB':
             img = img.convert('RGB')
@@ -44,11 +93,76 @@ def _copy_image_to_clipboard(image_path: Path) -> bool:
         img.save(output, format='BMP')
         bmp_data = output.getvalue()[14:]  # 去掉 BMP 文件头
         output.close()
+        return bmp_data
         
-        win32clipboard.OpenClipboard()
+    except Exception as e:
+        log.error("图片编码失败", path=str(image_path), error=str(e))
+        return None
+
+
+def _clipboard_is_staged(key: Any) -> bool:
+    """剪贴板是否仍保存着上次以 key 写入的内容"""
+    return (win32clipboard is not None
+            and _clipboard_state["key"] == key
+            and _clipboard_state["seq"] == win32clipboard.GetClipboardSequenceNumber())
+
+
+def _stage_clipboard(fmt: int, data: Any, key: Any):
+    """
+    写入剪贴板（一次 Open/Close），内容未被改动时跳过
+    
+    Args:
+        fmt: 剪贴板格式，如 CF_UNICODETEXT / CF_DIB
+        data: 剪贴板数据
+        key: 内容标识，用于判断剪贴板是否已是该内容
+    """
+    if win32clipboard is None:
+        raise RuntimeError("未安装 pywin32，无法访问剪贴板")
+    
+    if _clipboard_is_staged(key):
+        return
+    
+    win32clipboard.OpenClipboard()
+    try:
         win32clipboard.EmptyClipboard()
-        win32clipboard.SetClipboardData(win32clipboard.CF_DIB, bmp_data)
+        win32clipboard.SetClipboardData(fmt, data)
+    finally:
         win32clipboard.CloseClipboard()
+    
+    _clipboard_state["key"] = key
+    _clipboard_state["seq"] = win32clipboard.GetClipboardSequenceNumber()
+
+
+def _copy_text_to_clipboard(text: str) -> bool:
+    """将文本复制到 Windows 剪贴板"""
+    try:
+        _stage_clipboard(win32clipboard.CF_UNICODETEXT, text, ("text", text))
+        return True
+        
+    except Exception as e:
+        log.error("复制文本到剪贴板失败", error=str(e))
+        return False
+
+
+def _copy_image_to_clipboard(image_path: Path, bmp_data: Optional[bytes] = None) -> bool:
+    """
+    将图片复制到 Windows 剪贴板
+    
+    Args:
+        image_path: 图片路径
+        bmp_data: 已预处理的 DIB 数据（见 _prep_clipboard），None 时现场编码
+    """
+    try:
+        key = ("image", str(image_path))
+        if _clipboard_is_staged(key):
+            return True
+        
+        if bmp_data is None:
+            bmp_data = _prep_clipboard(image_path)
+            if bmp_data is None:
+                return False
+        
+        _stage_clipboard(win32clipboard.CF_DIB, bmp_data, key)
         
         log.debug("图片已复制到剪贴板", path=str(image_path))
         return True
@@ -67,7 +181,7 @@ def find_independent_chat_windows() -> List[Dict[str, Any]]:
     查找所有微信独立聊天窗口
     
     Returns:
-        窗口信息列表，每个元素包含 name, pure_name, window, rect
+        窗口信息列表，每个元素包含 name, pure_name, window, rect, hwnd
     """
     windows = []
     try:
@@ -81,12 +195,13 @@ def find_independent_chat_windows() -> List[Dict[str, Any]]:
                 # 微信聊天窗口特征：Qt51514QWindowIcon 类名，且名字不是"微信"
                 if "Qt51514QWindowIcon" in class_name and name and name != "微信":
                     # 提取纯群名（去掉可能的消息数，如 "家人们(5)" -> "家人们"）
-                    pure_name = re.sub(r'\(\d+\)$', '', name).strip()
+                    pure_name = _UNREAD_SUFFIX_RE.sub('', name).strip()
                     windows.append({
                         "name": name,           # 原始窗口名（可能带消息数）
                         "pure_name": pure_name, # 纯群名
                         "window": win,
-                        "rect": win.BoundingRectangle
+                        "rect": win.BoundingRectangle,
+                        "hwnd": win.NativeWindowHandle,
                     })
             except Exception:
                 pass
@@ -96,17 +211,20 @@ def find_independent_chat_windows() -> List[Dict[str, Any]]:
     return windows
 
 
-def find_window_by_group_name(group_name: str) -> Optional[Dict[str, Any]]:
+def find_window_by_group_name(group_name: str,
+                              windows: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
     """
     按群名查找独立窗口
     
     Args:
         group_name: 群名称
+        windows: 已枚举的窗口列表，None 时重新枚举
         
     Returns:
         窗口信息字典，未找到返回 None
     """
-    windows = find_independent_chat_windows()
+    if windows is None:
+        windows = find_independent_chat_windows()
     
     # 精确匹配
     for w in windows:
@@ -121,14 +239,61 @@ def find_window_by_group_name(group_name: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-def focus_independent_window(window_info: Dict[str, Any]) -> bool:
-    """聚焦独立窗口并点击输入框区域"""
+def load_delays() -> Dict[str, float]:
+    """加载发送等待时间：默认值 + 校准文件中的覆盖值"""
+    delays = dict(DEFAULT_DELAYS)
+    try:
+        with open(DELAYS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        delays.update({k: float(v) for k, v in data.items() if k in DEFAULT_DELAYS})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warn("读取校准文件失败，使用默认等待时间", error=str(e))
+    return delays
+
+
+def _wait_foreground(hwnd: int, timeout: float = 2.0, interval: float = 0.01) -> Optional[float]:
+    """
+    轮询等待窗口成为前台窗口
+    
+    Returns:
+        实际耗时（秒），超时返回 None
+    """
+    user32 = ctypes.windll.user32
+    start = time.perf_counter()
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        if user32.GetForegroundWindow() == hwnd:
+            return time.perf_counter() - start
+        time.sleep(interval)
+    return None
+
+
+def _is_window_alive(window_info: Dict[str, Any]) -> bool:
+    """检查缓存的窗口句柄是否仍然有效（O(1)，不遍历 UIA 树）"""
+    hwnd = window_info.get("hwnd")
+    return bool(hwnd) and bool(ctypes.windll.user32.IsWindow(hwnd))
+
+
+def focus_independent_window(window_info: Dict[str, Any],
+                             delays: Optional[Dict[str, float]] = None) -> bool:
+    """
+    聚焦独立窗口并点击输入框区域
+    
+    Args:
+        window_info: 窗口信息
+        delays: 各步骤等待时间，None 时使用默认值
+    """
+    if delays is None:
+        delays = DEFAULT_DELAYS
+    
     try:
         win = window_info["window"]
         name = window_info["name"]
         
         win.SetFocus()
-        time.sleep(0.2)
+        time.sleep(delays["after_focus"])
         
         # 获取窗口位置
         rect = win.BoundingRectangle
@@ -154,7 +319,7 @@ def focus_independent_window(window_info: Dict[str, Any]) -> bool:
             except Exception:
                 pass
         
-        time.sleep(0.2)
+        time.sleep(delays["after_click"])
         log.info(f"独立窗口已聚焦", name=name)
         return True
         
@@ -201,6 +366,11 @@ class WeChatBroadcaster:
         self.per_message_delay_sec = wechat_cfg.get("per_message_delay_sec", 2.0)
         self.max_per_minute = wechat_cfg.get("max_per_minute", 10)
         self.screenshot_on_error = wechat_cfg.get("screenshot_on_error", True)
+        # 每次失败都截图（调试用）；默认只在连续失败的第一次截图
+        self.debug_screenshots = wechat_cfg.get("debug_screenshots", False)
+        # 实例在多次任务执行间复用（见 scheduler._get_broadcaster），多个线程会同时更新连续失败计数
+        self._consecutive_failures = 0
+        self._failures_lock = threading.Lock()
         
         # 安全配置
         safety_cfg = config.get("safety", {})
@@ -208,7 +378,13 @@ class WeChatBroadcaster:
         self.dry_run = safety_cfg.get("dry_run", True)
         
         # 白名单
-        self.allowed_groups = set(config.get("allowed_groups", []))
+        self.allowed_groups = frozenset(config.get("allowed_groups", []))
+        
+        # 群名 -> 窗口信息缓存（句柄失效时自动重新枚举）；只在持有 _input_lock 时读写
+        self._window_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # 发送步骤等待时间（有校准结果时使用校准值）
+        self._delays = load_delays()
         
         # 初始化限频器
         reset_rate_limiter(self.max_per_minute)
@@ -220,19 +396,17 @@ class WeChatBroadcaster:
     
     def _take_screenshot(self, context: str) -> Optional[Path]:
         """错误时截图保存"""
-        if not self.screenshot_on_error:
+        if not self.screenshot_on_error or ImageGrab is None:
             return None
         
         safe_context = "".join(c if c.isalnum() or c in "-_" else "_" for c in context)
         
         try:
-            OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
             ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             filename = f"wechat_error_{safe_context}_{ts}.png"
             filepath = OUTPUT_DIR / filename
             
             # 使用 PIL 截图
-            from PIL import ImageGrab
             screenshot = ImageGrab.grab()
             screenshot.save(str(filepath))
             
@@ -264,16 +438,44 @@ class WeChatBroadcaster:
         for w in available:
             log.info(f"  - {w['pure_name']}")
         
-        # 检查目标群是否都有窗口
-        missing = [g for g in groups if not find_window_by_group_name(g)]
+        # 检查目标群是否都有窗口（复用本次枚举结果，持锁一次性写入缓存）
+        found = {}
+        missing = []
+        for g in groups:
+            window_info = find_window_by_group_name(g, available)
+            if window_info:
+                found[g] = window_info
+            else:
+                missing.append(g)
+        if found:
+            with _input_lock:
+                self._window_cache.update(found)
         if missing:
             log.warn(f"以下群没有打开独立窗口: {missing}")
         
         return True
     
+    def _lookup_window(self, group_name: str) -> Optional[Dict[str, Any]]:
+        """按群名获取窗口（优先使用缓存，句柄失效时重新枚举；需持有 _input_lock）"""
+        cached = self._window_cache.get(group_name)
+        if cached is not None and _is_window_alive(cached):
+            return cached
+        
+        self._window_cache.pop(group_name, None)
+        window_info = find_window_by_group_name(group_name)
+        if window_info:
+            self._window_cache[group_name] = window_info
+        return window_info
+    
     @retry(max_attempts=3, base_delay=1.0, jitter=0.3, exceptions=(Exception,))
-    def _send_to_group(self, group_name: str, text: str, image_path: Optional[Path] = None):
-        """发送消息到指定群"""
+    def _send_to_group(self, group_name: str, text: str, image_path: Optional[Path] = None,
+                       image_data: Optional[bytes] = None):
+        """
+        发送消息到指定群
+        
+        Args:
+            image_data: 预处理好的图片 DIB 数据（可选，避免在发送时编码图片）
+        """
         if self.dry_run:
             log.info(f"[DRY_RUN] 将发送到群",
                      group=group_name,
@@ -281,11 +483,20 @@ class WeChatBroadcaster:
                      has_image=image_path is not None)
             return
         
-        log.info("=" * 40)
-        log.info(f"[发送] 目标: {group_name}")
+        if log.is_debug:
+            log.debug(f"[发送] 目标: {group_name}")
+        
+        # 窗口查找/聚焦/剪贴板/按键都依赖全局输入状态，同一时刻只允许一个发送操作
+        with _input_lock:
+            self._send_via_window(group_name, text, image_path, image_data)
         
+        log.info(f"[完成] {group_name}")
+    
+    def _send_via_window(self, group_name: str, text: str, image_path: Optional[Path],
+                         image_data: Optional[bytes]):
+        """在群的独立窗口中粘贴并发送（需持有 _input_lock）"""
         # 1. 查找窗口
-        window_info = find_window_by_group_name(group_name)
+        window_info = self._lookup_window(group_name)
         if not window_info:
             available = find_independent_chat_windows()
             log.error(f"未找到 '{group_name}' 的独立窗口")
@@ -293,37 +504,86 @@ class WeChatBroadcaster:
                 log.info(f"可用窗口: {[w['pure_name'] for w in available]}")
             raise RuntimeError(f"未找到群 '{group_name}' 的独立窗口")
         
-        log.info(f"找到窗口: {window_info['name']}")
+        if log.is_debug:
+            log.debug(f"找到窗口: {window_info['name']}")
         
-        # 2. 聚焦窗口
-        if not focus_independent_window(window_info):
-            raise RuntimeError(f"无法聚焦 '{group_name}' 的窗口")
+        # 2. 聚焦窗口（缓存的控件失效时才重新枚举一次）
+        if not focus_independent_window(window_info, self._delays):
+            self._window_cache.pop(group_name, None)
+            window_info = self._lookup_window(group_name)
+            if not window_info or not focus_independent_window(window_info, self._delays):
+                raise RuntimeError(f"无法聚焦 '{group_name}' 的窗口")
         
         # 3. 发送图片
         if image_path and image_path.exists():
-            log.info(f"发送图片: {image_path}")
-            if _copy_image_to_clipboard(image_path):
-                send_keys("{Ctrl}v", 0.3)
-                send_keys("{Enter}", 0.5)
-                log.info("图片已发送")
+            if log.is_debug:
+                log.debug(f"发送图片: {image_path}")
+            if _copy_image_to_clipboard(image_path, image_data):
+                send_keys("{Ctrl}v", self._delays["after_image_paste"])
+                send_keys("{Enter}", self._delays["after_image_send"])
+                log.debug("图片已发送")
             else:
                 log.warn("图片复制失败，跳过")
         
         # 4. 发送文本
-        log.info(f"发送文本 ({len(text)} 字符)")
-        pyperclip.copy(text)
-        _safe_sleep(0.1, 0.15)
-        send_keys("{Ctrl}v", 0.2)
-        send_keys("{Enter}", 0.3)
+        if log.is_debug:
+            log.debug(f"发送文本 ({len(text)} 字符)")
+        # 剪贴板已是该文本（前一个群写入且未被改动）时无需重写，也无需等待剪贴板就绪
+        if not _clipboard_is_staged(("text", text)):
+            if not _copy_text_to_clipboard(text):
+                raise RuntimeError("复制文本到剪贴板失败")
+            time.sleep(0.1 + 0.05 * _rng.random())  # 随机 0.1~0.15 秒
+        send_keys("{Ctrl}v", self._delays["after_text_paste"])
+        send_keys("{Enter}", self._delays["after_text_send"])
+    
+    def calibrate(self, samples: int = 5, margin: float = 1.5,
+                  min_delay: float = 0.05) -> Dict[str, float]:
+        """
+        校准聚焦等待时间
         
-        log.info(f"[完成] {group_name}")
-        log.info("=" * 40)
+        在已打开的独立窗口之间轮流切换焦点，测量 SetFocus 到窗口真正成为前台的耗时，
+        取最大值（样本量小时即 p99）乘以余量作为 after_focus，写入校准文件。
+        其余步骤无可观测的完成信号，保持默认值。
+        
+        Args:
+            samples: 每个窗口的采样次数
+            margin: 安全余量倍数
+            min_delay: 等待时间下限（秒）
+            
+        Returns:
+            校准后的等待时间字典
+        """
+        windows = find_independent_chat_windows()
+        if len(windows) < 2:
+            raise RuntimeError("校准需要至少打开 2 个独立聊天窗口")
+        
+        measured = []
+        for _ in range(samples):
+            for w in windows:
+                w["window"].SetFocus()
+                elapsed = _wait_foreground(w["hwnd"])
+                if elapsed is not None:
+                    measured.append(elapsed)
+        
+        if not measured:
+            raise RuntimeError("校准失败：窗口始终未成为前台窗口")
+        
+        delays = load_delays()
+        delays["after_focus"] = round(max(min_delay, max(measured) * margin), 3)
+        
+        with open(DELAYS_FILE, "w", encoding="utf-8") as f:
+            json.dump(delays, f, ensure_ascii=False, indent=2)
+        
+        self._delays = delays
+        log.info("等待时间校准完成", samples=len(measured),
+                 max_focus=f"{max(measured):.3f}s", after_focus=delays["after_focus"])
+        return delays
     
     def _validate_whitelist(self, groups: List[str]):
         """校验白名单"""
-        invalid = [g for g in groups if g not in self.allowed_groups]
+        invalid = set(groups) - self.allowed_groups
         if invalid:
-            raise WhitelistError(f"以下群不在白名单中: {invalid}")
+            raise WhitelistError(f"以下群不在白名单中: {sorted(invalid)}")
     
     def broadcast(self, groups: List[str], text: str, image_path: Optional[Path] = None, 
                   task_name: str = "手动任务", immediate: bool = False, 
@@ -344,7 +604,6 @@ class WeChatBroadcaster:
         """
         from src.core.send_queue import get_send_queue
         
-        log.info("=" * 50)
         log.info("开始广播任务",
                  groups=len(groups),
                  text_len=len(text),
@@ -361,6 +620,14 @@ class WeChatBroadcaster:
         if not self.dry_run and not self.armed:
             raise SafetyError("安全保险丝未解除！设置 armed=true 启用发送")
         
+        # 立即执行模式：在工作线程预编码图片，与窗口检查/发送重叠；各群内容相同，结果可复用
+        prep_future = None
+        if immediate and image_path and not self.dry_run:
+            prep_future = _prep_pool.submit(_prep_clipboard, image_path)
+        elif immediate and not self.dry_run:
+            # 纯文本：各群内容相同，循环前写入剪贴板一次，后续各群直接粘贴
+            _copy_text_to_clipboard(text)
+        
         # 3. 检查独立窗口
         if not self._ensure_windows_ready(groups):
             raise RuntimeError("独立窗口未就绪，请先打开目标群的独立聊天窗口")
@@ -369,31 +636,41 @@ class WeChatBroadcaster:
         if immediate:
             log.info("【立即执行模式】跳过队列，直接发送")
             stats = {"sent": 0, "failed": 0, "skipped": 0, "scheduled": 0}
+            sent_groups = []
             
-            for i, group in enumerate(groups, 1):
-                log.info(f">>> 立即发送 {i}/{len(groups)}: {group}")
-                try:
-                    self._send_to_group(group, text, image_path)
-                    mark_sent(group)
-                    stats["sent"] += 1
-                except Exception as e:
-                    log.error(f"发送失败", group=group, error=str(e))
-                    stats["failed"] += 1
-                
-                # 消息间短暂延迟
-                if i < len(groups):
-                    time.sleep(self.per_message_delay_sec)
+            try:
+                for i, group in enumerate(groups, 1):
+                    log.info(f">>> 立即发送 {i}/{len(groups)}: {group}")
+                    try:
+                        image_data = prep_future.result() if prep_future else None
+                        self._send_to_group(group, text, image_path, image_data)
+                        sent_groups.append(group)
+                        stats["sent"] += 1
+                    except Exception as e:
+                        log.error(f"发送失败", group=group, error=str(e))
+                        stats["failed"] += 1
+                    
+                    # 消息间短暂延迟
+                    if i < len(groups):
+                        time.sleep(self.per_message_delay_sec)
+            finally:
+                # 发送记录整轮结束后一次写入（立即模式不检查间隔，无需逐群落盘）；
+                # 循环被中断（如 KeyboardInterrupt）时也要记下已发出的群
+                mark_sent_many(sent_groups)
+            
+            # 有失败时整轮结束后截一张图，记录最终界面状态
+            if stats["failed"] and not self.dry_run:
+                self._take_screenshot(f"broadcast_failed_{stats['failed']}")
             
             log.info("立即执行完成", **stats)
-            log.info("=" * 50)
             return stats
         
         # 5. 队列模式：过滤需要发送的群（去重检查）
         groups_to_send = []
         min_interval = self.config.get("wechat", {}).get("min_send_interval_sec", 60)
         
-        for group in groups:
-            if not should_send(group, min_interval_sec=min_interval):
+        for group, ok in zip(groups, should_send_batch(groups, min_interval_sec=min_interval)):
+            if not ok:
                 log.info(f"    跳过（间隔内）: {group}")
                 continue
             groups_to_send.append(group)
@@ -437,7 +714,6 @@ class WeChatBroadcaster:
         }
         
         log.info("广播任务已调度", **stats)
-        log.info("=" * 50)
         return stats
     
     def _do_send(self, group_name: str, text: str, image_path: Optional[Path]) -> bool:
@@ -448,11 +724,21 @@ class WeChatBroadcaster:
             是否成功
         """
         try:
-            self._send_to_group(group_name, text, image_path)
+            # 图片编码不涉及输入状态，在持有输入锁之前完成
+            image_data = None
+            if image_path and not self.dry_run:
+                image_data = _prep_clipboard(image_path)
+            self._send_to_group(group_name, text, image_path, image_data)
             mark_sent(group_name)
+            with self._failures_lock:
+                self._consecutive_failures = 0
             return True
         except Exception as e:
             log.error(f"发送失败", group=group_name, error=str(e))
-            if not self.dry_run:
+            with self._failures_lock:
+                self._consecutive_failures += 1
+                streak = self._consecutive_failures
+            # 截图耗时较长，连续失败时只截第一次（通常原因相同）
+            if not self.dry_run and (self.debug_screenshots or streak == 1):
                 self._take_screenshot(f"send_failed_{group_name}")
             return False
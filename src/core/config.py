@@ -4,12 +4,28 @@ from pathlib import Path
 
 CONFIG_FILE = Path(__file__).parent.parent.parent / "config.json"
 
+# 已解析配置缓存：{配置路径: (文件 mtime_ns, 配置字典)}
+_config_cache: dict = {}
+
 
 def load_config(config_path: Path = CONFIG_FILE) -> dict:
-    """加载 JSON 配置文件"""
-    if not config_path.exists():
+    """
+    加载 JSON 配置文件
+    
+    结果按文件修改时间缓存，文件未变化时直接返回缓存（只需一次 stat）。
+    返回的字典为共享缓存，调用方不应修改。
+    """
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(f"配置文件不存在: {config_path}")
     
+    cached = _config_cache.get(config_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
     with open(config_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
+        config = json.load(f)
+    
+    _config_cache[config_path] = (mtime, config)
+    return config
@@ -1,6 +1,7 @@
 """消息去重模块 - 基于时间间隔"""
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import datetime
+from typing import List, Optional
 
 from src.core.log import log
 from src.core.storage import get_store
@@ -9,27 +10,23 @@ from src.core.storage import get_store
 DEFAULT_MIN_INTERVAL_SEC = 60  # 1 分钟
 
 
-def should_send(group: str, min_interval_sec: int = DEFAULT_MIN_INTERVAL_SEC) -> bool:
-    """
-    检查是否应该发送（基于时间间隔）
-    
-    Args:
-        group: 群名
-        min_interval_sec: 最小发送间隔（秒），默认 60 秒
-        
-    Returns:
-        True 如果应该发送，False 如果在间隔时间内
-    """
-    store = get_store()
-    last_sent = store.get_last_sent_time(group)
-    
+def _to_epoch(last_sent: str) -> float:
+    """存储的发送时间转为 Unix 时间戳（兼容旧版 ISO 格式数据）"""
+    try:
+        return float(last_sent)
+    except ValueError:
+        return datetime.fromisoformat(last_sent).timestamp()
+
+
+def _interval_elapsed(group: str, last_sent: Optional[str], now: float,
+                      min_interval_sec: int) -> bool:
+    """根据最后发送时间判断是否已超过最小间隔"""
     if last_sent is None:
         # 从未发送过
         return True
     
     try:
-        last_dt = datetime.fromisoformat(last_sent)
-        elapsed = (datetime.now() - last_dt).total_seconds()
+        elapsed = now - _to_epoch(last_sent)
         
         if elapsed < min_interval_sec:
             log.info(f"跳过（间隔 {elapsed:.0f}s < {min_interval_sec}s）", 
@@ -43,17 +40,49 @@ def should_send(group: str, min_interval_sec: int = DEFAULT_MIN_INTERVAL_SEC) ->
         return True
 
 
+def should_send(group: str, min_interval_sec: int = DEFAULT_MIN_INTERVAL_SEC) -> bool:
+    """
+    检查是否应该发送（基于时间间隔）
+    
+    Args:
+        group: 群名
+        min_interval_sec: 最小发送间隔（秒），默认 60 秒
+        
+    Returns:
+        True 如果应该发送，False 如果在间隔时间内
+    """
+    store = get_store()
+    last_sent = store.get_last_sent_time(group)
+    return _interval_elapsed(group, last_sent, time.time(), min_interval_sec)
+
+
+def should_send_batch(groups: List[str], min_interval_sec: int = DEFAULT_MIN_INTERVAL_SEC) -> List[bool]:
+    """
+    批量检查多个群是否应该发送（只查询一次存储）
+    
+    Args:
+        groups: 群名列表
+        min_interval_sec: 最小发送间隔（秒）
+        
+    Returns:
+        与 groups 一一对应的布尔列表
+    """
+    last_sent_map = get_store().get_last_sent_times(groups)
+    now = time.time()
+    return [_interval_elapsed(g, last_sent_map.get(g), now, min_interval_sec) for g in groups]
+
+
 def mark_sent(group: str):
     """标记群已发送（记录当前时间）"""
     store = get_store()
     store.set_last_sent_time(group)
-    log.debug(f"标记已发送", group=group, time=datetime.now().isoformat())
+    log.debug(f"标记已发送", group=group)
 
 
-# ========== 兼容旧接口（废弃） ==========
+def mark_sent_many(groups: List[str]):
+    """批量标记多个群已发送（一次提交）"""
+    if not groups:
+        return
+    get_store().set_last_sent_times(groups)
+    log.debug(f"批量标记已发送", count=len(groups))
 
-def compute_key(group: str, text: str) -> str:
-    """废弃：基于内容的去重 key"""
-    import hashlib
-    content = f"{group}\n{text}"
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
@@ -1,10 +1,39 @@
 """日志模块 - 统一前缀和上下文，同时输出到控制台和文件"""
-from datetime import datetime
+import atexit
+import os
+import sys
+import threading
+import time
 from pathlib import Path
 
 # 日志文件路径
 LOG_DIR = Path(__file__).parent.parent.parent / "output"
 LOG_FILE = LOG_DIR / "wechat.log"
+_LOG_FILE_STR = str(LOG_FILE)
+
+# 日志目录在模块导入时创建一次
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# 日志级别（可通过环境变量 LOG_LEVEL 设置，默认 INFO）
+_LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+DEBUG = _LEVELS["DEBUG"]
+INFO = _LEVELS["INFO"]
+WARN = _LEVELS["WARN"]
+ERROR = _LEVELS["ERROR"]
+
+# 日志文件句柄：首次写入时打开并常驻（行缓冲），所有 Logger 共享
+_log_fh = None
+_log_fh_lock = threading.Lock()
+
+
+def _write_log_file(line: str):
+    """追加一行到日志文件"""
+    global _log_fh
+    with _log_fh_lock:
+        if _log_fh is None:
+            _log_fh = open(_LOG_FILE_STR, "a", encoding="utf-8", buffering=1)
+            atexit.register(_log_fh.close)
+        _log_fh.write(line)
 
 
 class Logger:
@@ -12,37 +41,58 @@ class Logger:
     
     def __init__(self, name: str = "app"):
         self.name = name
-        # 确保日志目录存在
-        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        self.level = _LEVELS.get(os.environ.get("LOG_LEVEL", "INFO").upper(), INFO)
+    
+    @property
+    def is_debug(self) -> bool:
+        """是否输出 DEBUG 日志（用于跳过昂贵的调试日志构造）"""
+        return self.level <= DEBUG
+    
+    def enabled_for(self, level: int) -> bool:
+        """指定级别的日志是否会被输出"""
+        return self.level <= level
     
     def _format(self, level: str, msg: str, **ctx) -> str:
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ctx_str = " ".join(f"{k}={v}" for k, v in ctx.items()) if ctx else ""
-        if ctx_str:
-            return f"[{ts}][{self.name}][{level}] {msg} | {ctx_str}"
-        return f"[{ts}][{self.name}][{level}] {msg}"
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        if ctx:
+            ctx_str = " ".join([f"{k}={v}" for k, v in ctx.items()])
+            return "[%s][%s][%s] %s | %s" % (ts, self.name, level, msg, ctx_str)
+        return "[%s][%s][%s] %s" % (ts, self.name, level, msg)
     
     def _log(self, level: str, msg: str, **ctx):
-        formatted = self._format(level, msg, **ctx)
-        # 输出到控制台
-        print(formatted)
+        line = self._format(level, msg, **ctx) + "\n"
+        # 输出到控制台（直接 write，省去 print 的参数处理；打包为无控制台程序时 stdout 为 None）
+        stdout = sys.stdout
+        if stdout is not None:
+            stdout.write(line)
+            if level == "ERROR":
+                stdout.flush()
         # 同时写入文件
         try:
-            with open(LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(formatted + "\n")
+            _write_log_file(line)
         except Exception:
             pass  # 写文件失败不影响主流程
     
+    # 级别过滤放在各方法入口，被抑制的调用不构造时间戳和上下文字符串
+    
     def info(self, msg: str, **ctx):
+        if self.level > INFO:
+            return
         self._log("INFO", msg, **ctx)
     
     def warn(self, msg: str, **ctx):
+        if self.level > WARN:
+            return
         self._log("WARN", msg, **ctx)
     
     def error(self, msg: str, **ctx):
+        if self.level > ERROR:
+            return
         self._log("ERROR", msg, **ctx)
     
     def debug(self, msg: str, **ctx):
+        if self.level > DEBUG:
+            return
         self._log("DEBUG", msg, **ctx)
 
 
@@ -1,13 +1,13 @@
-"""限频模块 - 滑动窗口"""
+"""限频模块 - 令牌桶"""
 import time
-from collections import deque
-from threading import Lock
+from threading import Condition
+from typing import List
 
 from src.core.log import log
 
 
 class RateLimiter:
-    """滑动窗口限频器"""
+    """令牌桶限频器（容量 = 每分钟配额，按固定速率补充，允许突发）"""
     
     def __init__(self, max_per_minute: int = 10):
         """
@@ -15,15 +15,16 @@ class RateLimiter:
             max_per_minute: 每分钟最大请求数
         """
         self.max_per_minute = max_per_minute
-        self.window_size = 60.0  # 60 秒窗口
-        self.timestamps: deque = deque()
-        self._lock = Lock()
+        self.capacity = float(max_per_minute)
+        self.rate = max_per_minute / 60.0  # 每秒补充的令牌数
+        self.tokens: float = self.capacity
+        self.last_refill: float = time.monotonic()
+        self._cond = Condition()
     
-    def _cleanup_old(self, now: float):
-        """清理窗口外的旧时间戳"""
-        cutoff = now - self.window_size
-        while self.timestamps and self.timestamps[0] < cutoff:
-            self.timestamps.popleft()
+    def _refill(self, now: float):
+        """按流逝时间补充令牌（惰性计算）"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
     
     def acquire(self) -> float:
         """
@@ -32,31 +33,47 @@ class RateLimiter:
         Returns:
             实际等待的秒数
         """
-        with self._lock:
-            now = time.time()
-            self._cleanup_old(now)
+        start = time.monotonic()
+        with self._cond:
+            self._refill(start)
             
-            waited = 0.0
+            # 令牌不足时等待补充（等待期间释放锁）
+            while self.tokens < 1:
+                wait_time = (1 - self.tokens) / self.rate
+                log.info(f"限频等待", wait=f"{wait_time:.2f}s", tokens=f"{self.tokens:.2f}", max=self.max_per_minute)
+                self._cond.wait(timeout=wait_time)
+                self._refill(time.monotonic())
             
-            # 如果已达上限，等待直到最早的请求过期
-            while len(self.timestamps) >= self.max_per_minute:
-                oldest = self.timestamps[0]
-                wait_time = (oldest + self.window_size) - time.time() + 0.01
-                if wait_time > 0:
-                    log.info(f"限频等待", wait=f"{wait_time:.2f}s", current=len(self.timestamps), max=self.max_per_minute)
-                    time.sleep(wait_time)
-                    waited += wait_time
-                now = time.time()
-                self._cleanup_old(now)
+            self.tokens -= 1
+            # 唤醒下一个等待者重新计算等待时间
+            self._cond.notify()
+            return time.monotonic() - start
+    
+    def acquire_batch(self, n: int) -> List[float]:
+        """
+        一次性预留 n 个请求配额（只加锁一次，不阻塞）
+        
+        第 k 个请求（从 0 计）需要等到桶中累计出 k+1 个令牌，可直接按补充速率算出时间点。
+        预留后令牌数可能为负，表示已被预支，后续 acquire 会相应等待。
+        
+        Args:
+            n: 请求数
             
-            self.timestamps.append(time.time())
-            return waited
+        Returns:
+            每个请求可执行的时间点，为相对本次调用的偏移秒数（非递减）
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            tokens = self.tokens
+            self.tokens -= n
+            return [max(0.0, (k + 1 - tokens) / self.rate) for k in range(n)]
     
     def current_count(self) -> int:
-        """当前窗口内的请求数"""
-        with self._lock:
-            self._cleanup_old(time.time())
-            return len(self.timestamps)
+        """当前已占用的配额数（容量 - 剩余令牌，限制在 [0, 容量] 内；批量预支的部分不计入）"""
+        with self._cond:
+            self._refill(time.monotonic())
+            used = round(self.capacity - self.tokens)
+            return max(0, min(self.max_per_minute, used))
 
 
 # 全局限频器实例（可在初始化时重新配置）
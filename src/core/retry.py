@@ -26,6 +26,9 @@ def retry(
         jitter: 抖动因子 (0~1)，随机增减延迟的比例
         exceptions: 需要重试的异常类型
     """
+    # 基础延迟序列只取决于装饰器参数，构造时算好：base * (exponential_base ^ (attempt-1))，上限 max_delay
+    delays = tuple(min(max_delay, base_delay * exponential_base ** i) for i in range(max_attempts - 1))
+    
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -39,9 +42,7 @@ def retry(
                         log.error(f"重试耗尽", func=func.__name__, attempt=attempt, error=str(e))
                         raise
                     
-                    # 计算延迟：base * (exponential_base ^ (attempt-1))
-                    delay = base_delay * (exponential_base ** (attempt - 1))
-                    delay = min(delay, max_delay)
+                    delay = delays[attempt - 1]
                     
                     # 添加 jitter
                     jitter_range = delay * jitter
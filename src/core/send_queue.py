@@ -1,12 +1,18 @@
 """全局发送队列管理
 
-所有任务的发送动作统一排队，避免冲突
+所有任务的发送动作统一排队，避免冲突。
+到期动作由执行器线程逐个执行：按计划时间先后，计划时间相同时按入队顺序。
+抢占键盘/剪贴板的部分由发送函数自行加锁（见 wechat_desktop._input_lock）。
 """
+import bisect
+import heapq
+import random
 import threading
 import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import List, Optional, Callable, Dict, Any
+from datetime import datetime
+from operator import attrgetter
+from typing import List, Optional, Callable, Dict, Any, Iterator, Tuple
 from pathlib import Path
 
 from src.core.log import Logger
@@ -27,7 +33,7 @@ def get_min_interval_sec() -> int:
         return DEFAULT_MIN_INTERVAL_SEC
 
 
-@dataclass
+@dataclass(slots=True)
 class SendAction:
     """发送动作"""
     id: str                          # 唯一ID
@@ -40,18 +46,32 @@ class SendAction:
     message: str = ""                # 执行结果消息
     created_at: datetime = field(default_factory=datetime.now)
     executed_at: Optional[datetime] = None
+    # 计划时间的 epoch 秒，用于排序和到期比较（scheduled_time 只用于展示）
+    scheduled_epoch: Optional[float] = None
+    # 展示用字段：计划时间/创建时间/文本在动作生命周期内不变，构造时格式化一次
+    text_preview: str = field(init=False, repr=False)
+    _scheduled_str: str = field(init=False, repr=False)
+    _created_str: str = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        if self.scheduled_epoch is None:
+            self.scheduled_epoch = self.scheduled_time.timestamp()
+        text = self.text
+        self.text_preview = text[:50] + "..." if len(text) > 50 else text
+        self._scheduled_str = self.scheduled_time.strftime("%Y-%m-%d %H:%M:%S")
+        self._created_str = self.created_at.strftime("%Y-%m-%d %H:%M:%S")
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
-            "scheduled_time": self.scheduled_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "scheduled_time": self._scheduled_str,
             "task_name": self.task_name,
             "group_name": self.group_name,
-            "text": self.text[:50] + "..." if len(self.text) > 50 else self.text,
+            "text": self.text_preview,
             "image_path": self.image_path,
             "status": self.status,
             "message": self.message,
-            "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "created_at": self._created_str,
             "executed_at": self.executed_at.strftime("%Y-%m-%d %H:%M:%S") if self.executed_at else None,
         }
 
@@ -60,8 +80,16 @@ class SendQueue:
     """全局发送队列"""
     
     def __init__(self):
-        self._queue: List[SendAction] = []
+        # 待执行动作小顶堆：(计划时间 epoch 秒, 序号, 动作)，堆顶即最早到期
+        self._pending_heap: List[Tuple[float, int, SendAction]] = []
+        # 正在执行的动作（id -> 动作）与已完成的动作
+        self._active: Dict[str, SendAction] = {}
+        self._done: List[SendAction] = []
+        # 待执行动作的计划时间（epoch 秒），保持有序，用于二分查找冲突时间槽
+        self._pending_times: List[float] = []
         self._lock = threading.Lock()
+        # 队列变化（新动作、清空、停止）时唤醒执行器，替代固定间隔轮询
+        self._cv = threading.Condition(self._lock)
         self._executor_thread: Optional[threading.Thread] = None
         self._running = False
         self._send_func: Optional[Callable] = None
@@ -92,112 +120,139 @@ class SendQueue:
         Returns:
             已添加的动作列表
         """
-        import random
+        now = time.time()
+        # 整批使用同一个间隔配置，避免逐群读取配置
+        min_interval = get_min_interval_sec()
+        
+        # 各群的初始时间（窗口内随机），按时间顺序分配时间槽
+        if window_minutes > 0:
+            # 整批一次生成：random() 比 randint() 少一层 Python 调用，结果同为 [0, span] 内的整数秒
+            span = window_minutes * 60 + 1
+            rnd = random.random
+            preferred = [now + int(rnd() * span) for _ in groups]
+        else:
+            preferred = [now] * len(groups)
+        order = sorted(range(len(groups)), key=preferred.__getitem__)
         
-        now = datetime.now()
-        actions = []
+        actions: List[Optional[SendAction]] = [None] * len(groups)
+        # 动作 ID = 任务名_序号_批次时间戳，时间戳整批只取一次
+        id_suffix = f"_{int(now)}"
         
         with self._lock:
-            for group in groups:
-                # 计算初始时间
-                if window_minutes > 0:
-                    offset_sec = random.randint(0, window_minutes * 60)
-                    initial_time = now + timedelta(seconds=offset_sec)
-                else:
-                    initial_time = now
+            # 调整时间避免冲突：候选时间与已有时间点都有序，一次归并扫描完成
+            existing = self._pending_times
+            assigned = []
+            j = 0
+            last = None
+            for i in order:
+                slot = preferred[i]
+                if last is not None:
+                    slot = max(slot, last + min_interval)
+                # 跳过远早于当前候选的已有时间点
+                while j < len(existing) and existing[j] <= slot - min_interval:
+                    j += 1
+                # 与已有时间点冲突则往后挪
+                while j < len(existing) and existing[j] - slot < min_interval:
+                    slot = max(slot, existing[j] + min_interval)
+                    j += 1
+                last = slot
+                assigned.append(slot)
                 
-                # 调整时间避免冲突
-                scheduled_time = self._find_available_slot(initial_time)
+                scheduled_time = datetime.fromtimestamp(slot)
                 
                 # 创建动作
                 self._action_counter += 1
                 action = SendAction(
-                    id=f"{task_name}_{self._action_counter}_{int(time.time())}",
+                    id=f"{task_name}_{self._action_counter}{id_suffix}",
                     scheduled_time=scheduled_time,
                     task_name=task_name,
-                    group_name=group,
+                    group_name=groups[i],
                     text=text,
                     image_path=image_path,
+                    scheduled_epoch=slot,
                 )
                 
-                self._queue.append(action)
-                actions.append(action)
+                heapq.heappush(self._pending_heap, (slot, self._action_counter, action))
+                actions[i] = action
                 
-                log.info(f"排队: {group} @ {scheduled_time.strftime('%H:%M:%S')}")
+                log.info(f"排队: {groups[i]} @ {scheduled_time.strftime('%H:%M:%S')}")
             
-            # 按时间排序
-            self._queue.sort(key=lambda x: x.scheduled_time)
+            self._pending_times = list(heapq.merge(existing, assigned))
+            self._cv.notify()
         
         return actions
     
-    def _find_available_slot(self, preferred_time: datetime) -> datetime:
-        """找到一个不冲突的时间槽"""
-        candidate = preferred_time
-        min_interval = get_min_interval_sec()
-        
-        # 获取所有待执行的时间点
-        existing_times = [
-            a.scheduled_time for a in self._queue 
-            if a.status == "pending"
-        ]
+    def _remove_pending_time(self, ts: float):
+        """从有序时间表中移除一个计划时间（需持有锁）"""
+        times = self._pending_times
+        idx = bisect.bisect_left(times, ts)
+        if idx < len(times) and times[idx] == ts:
+            del times[idx]
+    
+    def iter_queue(self, include_completed: bool = False,
+                   limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按计划时间顺序逐个生成动作字典（惰性格式化）
         
-        if not existing_times:
-            return candidate
+        Args:
+            include_completed: 是否包含已完成的动作
+            limit: 最多返回的数量，None 表示全部
+        """
+        # 锁内只做浅拷贝，排序和格式化在锁外完成
+        with self._lock:
+            actions = [entry[2] for entry in self._pending_heap]
+            actions.extend(self._active.values())
+            if include_completed:
+                actions.extend(self._done)
         
-        # 检查是否冲突，如果冲突则调整
-        max_attempts = 100  # 防止无限循环
-        for _ in range(max_attempts):
-            conflict = False
-            for existing in existing_times:
-                diff = abs((candidate - existing).total_seconds())
-                if diff < min_interval:
-                    # 冲突，往后挪
-                    candidate = existing + timedelta(seconds=min_interval)
-                    conflict = True
-                    break
-            
-            if not conflict:
-                break
+        key = attrgetter("scheduled_epoch")
+        if limit is not None:
+            actions = heapq.nsmallest(limit, actions, key=key)
+        else:
+            actions.sort(key=key)
         
-        return candidate
+        for a in actions:
+            yield a.to_dict()
     
-    def get_queue(self, include_completed: bool = False) -> List[Dict[str, Any]]:
+    def get_queue(self, include_completed: bool = False,
+                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """获取队列状态"""
-        with self._lock:
-            if include_completed:
-                actions = self._queue
-            else:
-                actions = [a for a in self._queue if a.status in ("pending", "running")]
-            
-            return [a.to_dict() for a in actions]
+        return list(self.iter_queue(include_completed, limit))
     
     def get_pending_count(self) -> int:
         """获取待执行数量"""
         with self._lock:
-            return len([a for a in self._queue if a.status == "pending"])
+            return len(self._pending_heap)
     
     def clear_completed(self):
         """清理已完成的动作"""
         with self._lock:
-            self._queue = [a for a in self._queue if a.status in ("pending", "running")]
+            self._done.clear()
     
     def clear_all(self):
         """清空所有待执行动作"""
         with self._lock:
             # 只保留正在执行的
-            self._queue = [a for a in self._queue if a.status == "running"]
+            self._pending_heap.clear()
+            self._done.clear()
+            self._pending_times.clear()
+            self._cv.notify()
             log.info("队列已清空")
     
     def clear_task(self, task_name: str):
         """清空指定任务的待执行动作"""
         with self._lock:
-            before = len([a for a in self._queue if a.status == "pending"])
-            self._queue = [
-                a for a in self._queue 
-                if a.status != "pending" or a.task_name != task_name
-            ]
-            after = len([a for a in self._queue if a.status == "pending"])
-            removed = before - after
+            before = len(self._pending_heap)
+            kept = []
+            for entry in self._pending_heap:
+                if entry[2].task_name == task_name:
+                    self._remove_pending_time(entry[0])
+                else:
+                    kept.append(entry)
+            heapq.heapify(kept)
+            self._pending_heap = kept
+            self._cv.notify()
+            removed = before - len(kept)
             if removed > 0:
                 log.info(f"已清除任务 '{task_name}' 的 {removed} 个待发送动作")
     
@@ -219,72 +274,94 @@ class SendQueue:
     
     def stop_executor(self):
         """停止执行器"""
-        self._running = False
+        with self._cv:
+            self._running = False
+            self._cv.notify()
         if self._executor_thread:
             self._executor_thread.join(timeout=5)
         log.info("发送队列执行器已停止")
     
+    # 无到期动作时的最长等待（秒），防止系统时间调整后长时间不醒
+    _MAX_IDLE_WAIT_SEC = 60
+    
     def _executor_loop(self):
-        """执行器主循环"""
+        """
+        执行器主循环：等到最早动作的计划时间或队列变化时才醒来
+        
+        到期动作在本线程内串行执行（发送本就独占键盘/剪贴板，并发没有收益），
+        因此严格保持堆序：计划时间早的先发，相同时按入队顺序。
+        """
         while self._running:
             try:
-                action = self._get_next_action()
-                if action:
-                    self._execute_action(action)
-                else:
-                    # 每10秒输出一次调试信息（如果有待处理任务）
-                    pending_count = self.get_pending_count()
-                    if pending_count > 0:
-                        log.debug(f"执行器运行中，待处理任务数: {pending_count}")
-                    time.sleep(1)  # 无任务时休眠
+                with self._cv:
+                    action, wait = self._get_next_action()
+                    if action is None:
+                        if wait is not None:
+                            log.debug(f"执行器运行中，待处理任务数: {len(self._pending_heap)}")
+                        self._cv.wait(timeout=min(wait or self._MAX_IDLE_WAIT_SEC, self._MAX_IDLE_WAIT_SEC))
+                        continue
+                self._execute_action(action)
             except Exception as e:
                 log.error(f"执行器错误: {e}", exc_info=True)
                 time.sleep(5)
     
-    def _get_next_action(self) -> Optional[SendAction]:
-        """获取下一个到期的动作"""
-        now = datetime.now()
+    def _get_next_action(self) -> Tuple[Optional[SendAction], Optional[float]]:
+        """
+        获取下一个到期的动作（需持有锁）
         
-        with self._lock:
-            # 按时间排序，优先处理最早的任务
-            pending_actions = [a for a in self._queue if a.status == "pending"]
-            pending_actions.sort(key=lambda x: x.scheduled_time)
-            
-            for action in pending_actions:
-                if action.scheduled_time <= now:
-                    action.status = "running"
-                    return action
+        Returns:
+            (到期动作, None)；无到期动作时返回 (None, 距最早计划时间的秒数)，队列为空时为 (None, None)
+        """
+        if not self._pending_heap:
+            return None, None
         
-        return None
+        # 堆顶即计划时间最早的任务
+        ts, _, earliest = self._pending_heap[0]
+        wait = ts - time.time()
+        if wait > 0:
+            return None, wait
+        
+        heapq.heappop(self._pending_heap)
+        earliest.status = "running"
+        self._remove_pending_time(ts)
+        self._active[earliest.id] = earliest
+        return earliest, None
+    
+    def _retire(self, action: SendAction):
+        """动作执行结束，移入已完成列表（需持有锁）"""
+        self._active.pop(action.id, None)
+        self._done.append(action)
     
     def _execute_action(self, action: SendAction):
         """执行发送动作"""
         log.info(f"执行发送: {action.group_name} (任务: {action.task_name})")
         
+        # 结果字段只由执行器线程写入（单次引用赋值），无需加锁；
+        # 只有移动动作所在的容器时才加锁，且只加一次
         try:
             if self._send_func:
                 image_path = Path(action.image_path) if action.image_path else None
                 success = self._send_func(action.group_name, action.text, image_path)
                 
-                with self._lock:
-                    action.executed_at = datetime.now()
-                    if success:
-                        action.status = "success"
-                        action.message = "发送成功"
-                    else:
-                        action.status = "failed"
-                        action.message = "发送失败"
-            else:
-                with self._lock:
+                action.executed_at = datetime.now()
+                if success:
+                    action.message = "发送成功"
+                    action.status = "success"
+                else:
+                    action.message = "发送失败"
                     action.status = "failed"
-                    action.message = "发送函数未设置"
+            else:
+                action.message = "发送函数未设置"
+                action.status = "failed"
                     
         except Exception as e:
-            with self._lock:
-                action.executed_at = datetime.now()
-                action.status = "failed"
-                action.message = str(e)
+            action.executed_at = datetime.now()
+            action.message = str(e)
+            action.status = "failed"
             log.error(f"发送失败: {action.group_name}, 错误: {e}")
+        
+        with self._lock:
+            self._retire(action)
 
 
 # 全局单例
@@ -293,9 +370,13 @@ _queue_lock = threading.Lock()
 
 
 def get_send_queue() -> SendQueue:
-    """获取全局发送队列"""
+    """获取全局发送队列（双重检查：实例已存在时不加锁）"""
     global _queue_instance
     
+    queue = _queue_instance
+    if queue is not None:
+        return queue
+    
     with _queue_lock:
         if _queue_instance is None:
             _queue_instance = SendQueue()
@@ -1,13 +1,31 @@
 """SQLite 存储模块"""
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from src.core.log import log
 
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "output"
 
+# ========== SQL 语句 ==========
+# 固定文本的语句：sqlite3 按 SQL 文本缓存已编译语句，同一连接重复执行时无需重新解析
+
+_SQL_CREATE_GROUP_LAST_SENT = """
+    CREATE TABLE IF NOT EXISTS group_last_sent (
+        group_name TEXT PRIMARY KEY,
+        last_sent_time TEXT NOT NULL
+    )
+"""
+
+_Q_GET_LAST_SENT = "SELECT last_sent_time FROM group_last_sent WHERE group_name = ?"
+_Q_GET_LAST_SENT_IN = "SELECT group_name, last_sent_time FROM group_last_sent WHERE group_name IN ({})"
+_Q_SET_LAST_SENT = "INSERT OR REPLACE INTO group_last_sent (group_name, last_sent_time) VALUES (?, ?)"
+_Q_ALL_LAST_SENT = "SELECT group_name, last_sent_time FROM group_last_sent"
+_Q_CLEAR_LAST_SENT = "DELETE FROM group_last_sent"
+
 
 class SQLiteStore:
     """SQLite 持久化存储"""
@@ -22,81 +40,63 @@ class SQLiteStore:
             db_path = OUTPUT_DIR / "state.db"
         
         self.db_path = db_path
-        self._conn: Optional[sqlite3.Connection] = None
+        # 构造时即建立连接，之后各方法直接使用 self._conn，无需每次判断懒加载
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(self.db_path, check_same_thread=False)
+        # 是否处于 transaction() 显式事务中（事务内各写方法不单独提交）
+        self._in_tx = False
         self._init_db()
     
-    def _get_conn(self) -> sqlite3.Connection:
-        """获取数据库连接（懒加载）"""
-        if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        return self._conn
-    
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接（关闭后实例不可再使用）"""
         if self._conn is not None:
             self._conn.close()
             self._conn = None
     
     def _init_db(self):
         """初始化数据库表"""
-        conn = self._get_conn()
-        # 旧表（基于内容去重，已废弃）
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS sent_log (
-                key TEXT PRIMARY KEY,
-                ts TEXT NOT NULL
-            )
-        """)
-        # 新表：基于群名+时间间隔去重
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS group_last_sent (
-                group_name TEXT PRIMARY KEY,
-                last_sent_time TEXT NOT NULL
-            )
-        """)
+        conn = self._conn
+        # WAL + synchronous=NORMAL：提交时不再同步刷写回滚日志
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        # 基于群名+时间间隔去重（last_sent_time 为 Unix 时间戳，旧数据为 ISO 字符串）
+        conn.execute(_SQL_CREATE_GROUP_LAST_SENT)
         conn.commit()
         log.debug(f"数据库初始化完成", path=str(self.db_path))
     
-    def has_key(self, key: str) -> bool:
-        """检查 key 是否已存在"""
-        conn = self._get_conn()
-        cursor = conn.execute("SELECT 1 FROM sent_log WHERE key = ?", (key,))
-        return cursor.fetchone() is not None
+    def _commit(self):
+        """提交当前写入；处于显式事务中时推迟到事务结束统一提交"""
+        if not self._in_tx:
+            self._conn.commit()
     
-    def set_key(self, key: str) -> bool:
+    @contextmanager
+    def transaction(self):
         """
-        记录一个 key（带时间戳）
+        显式事务：块内的多次写入只提交一次，异常时整体回滚
         
-        Returns:
-            True 如果成功插入，False 如果已存在
+        用法:
+            with store.transaction():
+                store.set_last_sent_time("群1")
+                store.set_last_sent_time("群2")
         """
-        ts = datetime.now().isoformat()
+        if self._in_tx:
+            # 已在事务中，直接并入外层事务
+            yield self._conn
+            return
+        
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        self._in_tx = True
         try:
-            conn = self._get_conn()
-            conn.execute("INSERT INTO sent_log (key, ts) VALUES (?, ?)", (key, ts))
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
             conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False  # key 已存在
-    
-    def get_ts(self, key: str) -> Optional[str]:
-        """获取 key 的时间戳"""
-        conn = self._get_conn()
-        cursor = conn.execute("SELECT ts FROM sent_log WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        return row[0] if row else None
-    
-    def count(self) -> int:
-        """获取记录总数"""
-        conn = self._get_conn()
-        cursor = conn.execute("SELECT COUNT(*) FROM sent_log")
-        return cursor.fetchone()[0]
-    
-    def clear(self):
-        """清空所有记录（慎用）"""
-        conn = self._get_conn()
-        conn.execute("DELETE FROM sent_log")
-        conn.commit()
+        finally:
+            self._in_tx = False
     
     # ========== 基于时间间隔的去重 ==========
     
@@ -108,51 +108,81 @@ class SQLiteStore:
             group_name: 群名
             
         Returns:
-            ISO 格式时间字符串，或 None（从未发送）
+            Unix 时间戳字符串（旧数据可能为 ISO 格式），或 None（从未发送）
         """
-        conn = self._get_conn()
-        cursor = conn.execute(
-            "SELECT last_sent_time FROM group_last_sent WHERE group_name = ?",
-            (group_name,)
-        )
+        conn = self._conn
+        cursor = conn.execute(_Q_GET_LAST_SENT, (group_name,))
         row = cursor.fetchone()
         return row[0] if row else None
     
+    def get_last_sent_times(self, group_names: List[str]) -> Dict[str, str]:
+        """
+        批量获取多个群的最后发送时间（一次查询）
+        
+        Args:
+            group_names: 群名列表
+            
+        Returns:
+            {群名: Unix 时间戳字符串（旧数据可能为 ISO 格式）}，从未发送的群不在结果中
+        """
+        if not group_names:
+            return {}
+        conn = self._conn
+        placeholders = ",".join("?" * len(group_names))
+        cursor = conn.execute(_Q_GET_LAST_SENT_IN.format(placeholders), list(group_names))
+        return dict(cursor.fetchall())
+    
     def set_last_sent_time(self, group_name: str):
         """
-        记录群的最后发送时间（当前时间）
+        记录群的最后发送时间（当前 Unix 时间戳）
         
         Args:
             group_name: 群名
         """
-        ts = datetime.now().isoformat()
-        conn = self._get_conn()
-        conn.execute("""
-            INSERT OR REPLACE INTO group_last_sent (group_name, last_sent_time)
-            VALUES (?, ?)
-        """, (group_name, ts))
-        conn.commit()
+        ts = time.time()
+        conn = self._conn
+        conn.execute(_Q_SET_LAST_SENT, (group_name, ts))
+        self._commit()
+    
+    def set_last_sent_times(self, group_names: List[str]):
+        """
+        批量记录多个群的最后发送时间（同一时间戳，一次提交）
+        
+        Args:
+            group_names: 群名列表
+        """
+        if not group_names:
+            return
+        ts = time.time()
+        conn = self._conn
+        conn.executemany(_Q_SET_LAST_SENT, [(name, ts) for name in group_names])
+        self._commit()
     
     def get_all_group_times(self) -> dict:
         """获取所有群的最后发送时间"""
-        conn = self._get_conn()
-        cursor = conn.execute("SELECT group_name, last_sent_time FROM group_last_sent")
-        return {row[0]: row[1] for row in cursor.fetchall()}
+        conn = self._conn
+        # 游标直接交给 dict()，由 C 层迭代构建
+        return dict(conn.execute(_Q_ALL_LAST_SENT))
     
     def clear_group_times(self):
         """清空群发送时间记录"""
-        conn = self._get_conn()
-        conn.execute("DELETE FROM group_last_sent")
-        conn.commit()
+        conn = self._conn
+        conn.execute(_Q_CLEAR_LAST_SENT)
+        self._commit()
 
 
 # 全局存储实例
 _store: SQLiteStore = None
+_store_lock = threading.Lock()
 
 
 def get_store() -> SQLiteStore:
-    """获取全局存储实例"""
+    """获取全局存储实例（双重检查：实例已存在时不加锁）"""
     global _store
-    if _store is None:
-        _store = SQLiteStore()
-    return _store
+    store = _store
+    if store is not None:
+        return store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteStore()
+        return _store
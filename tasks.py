@@ -10,7 +10,7 @@ from robocorp.tasks import task
 
 from src.adapters.wechat_desktop import WeChatBroadcaster, SafetyError, WhitelistError
 from src.core.config import load_config
-from src.core.dedupe import should_send, mark_sent, compute_key
+from src.core.dedupe import should_send, mark_sent
 from src.core.log import log
 from src.core.ratelimit import RateLimiter
 from src.core.retry import retry
@@ -88,17 +88,32 @@ def self_test_core():
     print("=" * 60)
     
     # ========== 测试 1: RateLimiter ==========
-    print("\n[测试 1] RateLimiter 滑动窗口限频")
+    print("\n[测试 1] RateLimiter 令牌桶限频")
     limiter = RateLimiter(max_per_minute=5)
     
     for i in range(7):
         start = time.time()
         waited = limiter.acquire()
         elapsed = time.time() - start
-        print(f"  请求 {i+1}: 等待 {waited:.2f}s, 当前窗口计数={limiter.current_count()}")
+        print(f"  请求 {i+1}: 等待 {waited:.2f}s, 已占用配额={limiter.current_count()}")
         if i < 5:
             assert waited < 0.1, f"前 5 次不应等待，但等待了 {waited:.2f}s"
     
+    batch_limiter = RateLimiter(max_per_minute=5)
+    schedule = batch_limiter.acquire_batch(7)
+    print(f"  批量预留 7 个: {[f'{t:.1f}s' for t in schedule]}")
+    assert schedule[:5] == [0.0] * 5, "前 5 个不应等待"
+    assert abs(schedule[6] - 24.0) < 0.1, f"第 7 个应在约 24s 后，实际 {schedule[6]:.2f}s"
+    assert batch_limiter.current_count() == 5, "预支后已占用配额不应超过容量"
+    
+    # 批量预支超过容量后，单次 acquire 排在预支的最后一个之后（每秒 10 个令牌，预支 2 个）
+    fast_limiter = RateLimiter(max_per_minute=600)
+    schedule = fast_limiter.acquire_batch(602)
+    waited = fast_limiter.acquire()
+    print(f"  预支 602 个后 acquire: 等待 {waited:.2f}s, 已占用配额={fast_limiter.current_count()}")
+    assert schedule[-1] <= waited < 0.5, f"应在预支的最后一个（{schedule[-1]:.2f}s）之后、约 0.3s 时获得配额，实际 {waited:.2f}s"
+    assert fast_limiter.current_count() == 600, "已占用配额不应超过容量"
+    
     print("  ✓ RateLimiter 测试通过")
     
     # ========== 测试 2: SQLiteStore ==========
@@ -109,17 +124,30 @@ def self_test_core():
     
     store = SQLiteStore(test_db)
     
-    # 测试 set/has
-    assert not store.has_key("test_key_1"), "新 key 不应存在"
-    assert store.set_key("test_key_1"), "首次插入应返回 True"
-    assert store.has_key("test_key_1"), "插入后应存在"
-    assert not store.set_key("test_key_1"), "重复插入应返回 False"
-    
-    # 测试 count
-    store.set_key("test_key_2")
-    assert store.count() == 2, f"应有 2 条记录，实际 {store.count()}"
-    
-    print(f"  记录数: {store.count()}")
+    # 测试单群读写
+    assert store.get_last_sent_time("群A") is None, "新群不应有发送记录"
+    store.set_last_sent_time("群A")
+    assert store.get_last_sent_time("群A") is not None, "写入后应有发送记录"
+    
+    # 测试批量读写
+    store.set_last_sent_times(["群B", "群C"])
+    times = store.get_last_sent_times(["群A", "群B", "群D"])
+    assert set(times) == {"群A", "群B"}, f"批量查询结果错误: {times}"
+    
+    # 测试事务提交与回滚
+    with store.transaction():
+        store.set_last_sent_time("群D")
+        store.set_last_sent_time("群E")
+    assert len(store.get_all_group_times()) == 5, f"应有 5 条记录，实际 {len(store.get_all_group_times())}"
+    try:
+        with store.transaction():
+            store.set_last_sent_time("群F")
+            raise RuntimeError("模拟失败")
+    except RuntimeError:
+        pass
+    assert store.get_last_sent_time("群F") is None, "事务异常后应回滚"
+    
+    print(f"  记录数: {len(store.get_all_group_times())}")
     print("  ✓ SQLiteStore 测试通过")
     
     # 清理测试数据库（先关闭连接）
@@ -8,14 +8,127 @@
   python test_independent_windows.py --send          # 真正发送（谨慎！）
 """
 
+import ctypes
+import ctypes.wintypes
 import sys
+import threading
 import time
 import uiautomation as auto
-import pyperclip
 
+try:
+    import win32clipboard
+except ImportError:  # 未安装 pywin32 时仍可 --list，发送时再报错
+    win32clipboard = None
 
-def find_wechat_chat_windows():
-    """查找所有微信独立聊天窗口"""
+
+def wait_foreground(hwnd, timeout=0.5, interval=0.01):
+    """轮询等待窗口成为前台窗口（替代固定 sleep），返回是否成功"""
+    user32 = ctypes.windll.user32
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if user32.GetForegroundWindow() == hwnd:
+            return True
+        time.sleep(interval)
+    return False
+
+
+def wait_input_cleared(win, timeout=0.3, interval=0.02):
+    """
+    发送后轮询输入框是否已清空（发送完成信号），最多等待 timeout 秒
+    
+    找不到输入框或读不到内容时按 timeout 兜底等待
+    """
+    deadline = time.perf_counter() + timeout
+    try:
+        edit = win.EditControl(searchDepth=10)
+        if edit.Exists(0, 0):
+            pattern = edit.GetValuePattern()
+            while time.perf_counter() < deadline:
+                if not pattern.Value:
+                    return True
+                time.sleep(interval)
+            return False
+    except Exception:
+        pass
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+    return False
+
+
+def copy_text(text):
+    """直接写入剪贴板（CF_UNICODETEXT）"""
+    if win32clipboard is None:
+        raise RuntimeError("写剪贴板需要 pywin32，请先执行: pip install pywin32")
+    win32clipboard.OpenClipboard()
+    try:
+        win32clipboard.EmptyClipboard()
+        win32clipboard.SetClipboardData(win32clipboard.CF_UNICODETEXT, text)
+    finally:
+        win32clipboard.CloseClipboard()
+
+
+# 窗口列表缓存：(获取时间, 窗口列表)，TTL 内或无窗口创建/销毁事件时直接复用
+WINDOW_CACHE_TTL = 2.0
+_win_cache = None
+_win_hook_started = False
+
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+
+_WinEventProc = ctypes.WINFUNCTYPE(
+    None, ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD, ctypes.wintypes.HWND,
+    ctypes.wintypes.LONG, ctypes.wintypes.LONG, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD
+)
+
+
+def _on_win_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+    """顶层窗口创建/销毁时使缓存失效"""
+    global _win_cache
+    if id_object == OBJID_WINDOW and id_child == 0:
+        _win_cache = None
+
+
+# 回调对象需常驻，防止被回收
+_win_event_proc = _WinEventProc(_on_win_event)
+
+
+def _win_event_loop():
+    """后台线程：注册窗口事件钩子并运行消息循环"""
+    user32 = ctypes.windll.user32
+    hook = user32.SetWinEventHook(EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, 0,
+                                  _win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+    if not hook:
+        return
+    msg = ctypes.wintypes.MSG()
+    while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+        user32.TranslateMessage(ctypes.byref(msg))
+        user32.DispatchMessageW(ctypes.byref(msg))
+
+
+def _ensure_win_hook():
+    """首次查询时启动窗口事件监听线程"""
+    global _win_hook_started
+    if not _win_hook_started:
+        _win_hook_started = True
+        threading.Thread(target=_win_event_loop, daemon=True).start()
+
+
+def find_wechat_chat_windows(use_cache=True):
+    """
+    查找所有微信独立聊天窗口
+    
+    结果缓存 WINDOW_CACHE_TTL 秒，期间有窗口创建/销毁时自动失效
+    """
+    global _win_cache
+    _ensure_win_hook()
+    
+    cached = _win_cache
+    if use_cache and cached is not None and time.monotonic() - cached[0] < WINDOW_CACHE_TTL:
+        return cached[1]
+    
     windows = []
     root = auto.GetRootControl()
     
@@ -29,11 +142,13 @@ def find_wechat_chat_windows():
                 windows.append({
                     "name": name,
                     "window": win,
-                    "rect": win.BoundingRectangle
+                    "rect": win.BoundingRectangle,
+                    "hwnd": win.NativeWindowHandle
                 })
         except:
             pass
     
+    _win_cache = (time.monotonic(), windows)
     return windows
 
 
@@ -73,29 +188,24 @@ def focus_and_send(window, message, dry_run=True):
     print(f"[{name}] 正在处理...")
     
     try:
-        # 1. 激活窗口
+        # 1. 激活窗口（等到真正成为前台窗口）
         win.SetFocus()
-        time.sleep(0.3)
+        if not wait_foreground(window["hwnd"]):
+            print(f"[{name}] 警告: 窗口未成为前台窗口")
         
         # 2. 点击窗口使其获得焦点
-        win.Click()
-        time.sleep(0.3)
+        win.Click(waitTime=0)
         
         if dry_run:
             print(f"[{name}] [DRY RUN] 将发送: {message}")
             return True
         
         # 3. 复制消息到剪贴板
-        pyperclip.copy(message)
-        time.sleep(0.1)
-        
-        # 4. Ctrl+V 粘贴
-        auto.SendKeys("{Ctrl}v")
-        time.sleep(0.2)
+        copy_text(message)
         
-        # 5. Enter 发送
-        auto.SendKeys("{Enter}")
-        time.sleep(0.3)
+        # 4. Ctrl+V 粘贴 + Enter 发送（一次输入）
+        auto.SendKeys("{Ctrl}v{Enter}", waitTime=0)
+        wait_input_cleared(win)  # 输入框清空即发送完成
         
         print(f"[{name}] ✓ 已发送: {message}")
         return True
@@ -133,8 +243,8 @@ def test_single_window(target_name):
     try:
         win = target["window"]
         win.SetFocus()
-        time.sleep(0.3)
-        win.Click()
+        wait_foreground(target["hwnd"])
+        win.Click(waitTime=0)
         print(f"✓ 已聚焦窗口: {target['name']}")
         return True
     except Exception as e:
@@ -169,8 +279,6 @@ def send_to_all_windows(dry_run=True):
             success += 1
         else:
             failed += 1
-        
-        time.sleep(0.5)  # 窗口切换间隔
     
     print()
     print("-" * 60)
@@ -198,6 +306,9 @@ def main():
             print("示例: python test_independent_windows.py --test 家人们")
     
     elif "--send" in args:
+        if win32clipboard is None:
+            print("错误: 真实发送需要写剪贴板，请先安装 pywin32: pip install pywin32")
+            return
         print("⚠️  警告: 即将真实发送消息到所有独立窗口！")
         print()
         confirm = input("确认发送? (输入 yes 继续): ")
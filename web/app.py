@@ -1,11 +1,31 @@
 """Flask Web 管理应用"""
+import hashlib
 import json
 import os
+import re
+import shutil
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, session
+from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, session, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+from flask.sessions import SecureCookieSessionInterface
+from markupsafe import Markup
+
+try:
+    import orjson
+except ImportError:  # 未安装时回退到 Flask 默认的标准库 json
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # 未安装时不压缩响应
+    Compress = None
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -15,18 +35,149 @@ from web.models import db, ScheduledTask, ExecutionLog
 from web.scheduler import (
     init_scheduler, start_scheduler, stop_scheduler,
     get_scheduler_status, add_job_for_task, remove_job_for_task,
-    execute_task, reload_all_jobs
+    execute_task, reload_all_jobs, RUN_POOL
 )
 from src.core.config import load_config
 
+class OrjsonProvider(DefaultJSONProvider):
+    """基于 orjson 的 JSON 序列化（datetime/dataclass 原生支持，比标准库快得多）"""
+    
+    compact = True
+    
+    # orjson 能对应上的 json.dumps 参数（ensure_ascii/separators 不影响结果的合法性，忽略）；
+    # 传入其他参数（cls、allow_nan 等）或非 2 格缩进时回退到标准库实现
+    _ORJSON_DUMPS_ARGS = frozenset(("default", "sort_keys", "indent", "separators", "ensure_ascii"))
+    
+    def dumps(self, obj, **kwargs) -> str:
+        if not kwargs.keys() <= self._ORJSON_DUMPS_ARGS or kwargs.get("indent") not in (None, 2):
+            return super().dumps(obj, **kwargs)
+        # 与标准库一致：非字符串键转为字符串，sort_keys 默认取 Flask 配置
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        # 无法原生序列化的类型交给 Flask 默认处理（date、UUID、Decimal 等）
+        default = kwargs.get("default", self.default)
+        return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+class Blake2SessionInterface(SecureCookieSessionInterface):
+    """会话 Cookie 签名改用 BLAKE2b（默认为 SHA-1）"""
+    digest_method = staticmethod(hashlib.blake2b)
+
+
+# 会话密钥文件：未设置 FLASK_SECRET 时生成一次并持久化，重启后会话仍然有效
+SECRET_KEY_FILE = PROJECT_ROOT / "output" / "secret_key"
+
+
+def _persisted_key() -> bytes:
+    """
+    读取持久化的会话密钥，不存在时生成并写入
+    
+    新密钥先写入仅属主可读写（0600）的临时文件，再以硬链接发布到正式路径：
+    链接不会覆盖已有文件，多个进程同时启动时只有一个能发布成功，其余读取其密钥。
+    """
+    try:
+        key = SECRET_KEY_FILE.read_bytes()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    key = os.urandom(32)
+    tmp_path = SECRET_KEY_FILE.with_name(f"{SECRET_KEY_FILE.name}.{os.getpid()}.tmp")
+    try:
+        SECRET_KEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp_path, SECRET_KEY_FILE)
+        except FileExistsError:
+            # 其他进程已先发布密钥，以它为准
+            return SECRET_KEY_FILE.read_bytes() or key
+    except OSError as e:
+        print(f"[警告] 保存会话密钥失败，重启后会话将失效: {e}")
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    return key
+
+
 # 创建 Flask 应用
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+app.secret_key = os.environ.get("FLASK_SECRET") or _persisted_key()
+app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
+app.session_interface = Blake2SessionInterface()
+
+# 响应压缩：超过 1KB 的响应按客户端支持使用 Brotli 或 gzip（低压缩级别，优先速度）
+if Compress is not None:
+    app.config["COMPRESS_MIN_SIZE"] = 1024
+    app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    app.config["COMPRESS_LEVEL"] = 4
+    app.config["COMPRESS_BR_LEVEL"] = 4
+    Compress(app)
 
 # 上传文件夹
 UPLOAD_FOLDER = PROJECT_ROOT / "assets" / "uploads"
 UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 
+# 上传文件复制块大小（大块减少读写系统调用次数）
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# waitress 工作线程数（处理函数以数据库 I/O 为主，多线程即可并发）
+SERVER_THREADS = 8
+
+
+def save_upload(file, filepath: Path):
+    """
+    将上传文件流式写入磁盘（readinto 复用同一块缓冲区，不为每块分配新 bytes）
+    
+    目标文件用带缓冲的写入：BufferedWriter.write 保证整块写完，不会像裸 FileIO 那样部分写入。
+    """
+    src = file.stream
+    with open(filepath, "wb", buffering=UPLOAD_CHUNK_SIZE) as dst:
+        if not hasattr(src, "readinto"):
+            shutil.copyfileobj(src, dst, length=UPLOAD_CHUNK_SIZE)
+            return
+        buf = memoryview(bytearray(UPLOAD_CHUNK_SIZE))
+        while (n := src.readinto(buf)):
+            dst.write(buf[:n])
+
+
+# 调度器状态缓存：同一秒内的多个请求共用一次查询结果
+STATUS_CACHE_TTL = 1.0
+_status_cache = [0.0, None]  # [过期时间（monotonic）, 状态字典]
+
+
+def cached_scheduler_status() -> dict:
+    """获取调度器状态（缓存 STATUS_CACHE_TTL 秒，返回的字典为共享缓存，调用方不应修改）"""
+    now = time.monotonic()
+    expires, status = _status_cache
+    if status is None or now >= expires:
+        status = get_scheduler_status()
+        _status_cache[:] = [now + STATUS_CACHE_TTL, status]
+    return status
+
+
+@app.after_request
+def _invalidate_status_on_write(response):
+    """POST 请求可能增删任务或启停调度器，处理完后使状态缓存失效"""
+    if request.method == "POST":
+        _status_cache[1] = None
+    return response
+
 
 def get_allowed_groups():
     """获取白名单群组列表"""
@@ -44,7 +195,7 @@ def index():
     """首页 - 任务列表"""
     tasks = db.get_all_tasks()
     logs = db.get_logs(limit=10)
-    status = get_scheduler_status()
+    status = cached_scheduler_status()
     allowed_groups = get_allowed_groups()
     immediate_run_enabled = session.get("immediate_run_enabled", False)
     
@@ -60,7 +211,7 @@ def index():
 def new_task():
     """新建任务"""
     allowed_groups = get_allowed_groups()
-    status = get_scheduler_status()
+    status = cached_scheduler_status()
     
     if request.method == "POST":
         # 处理随机延时（空字符串或 None 表示使用默认值）
@@ -86,7 +237,7 @@ def new_task():
             if file and file.filename:
                 filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
                 filepath = UPLOAD_FOLDER / filename
-                file.save(str(filepath))
+                save_upload(file, filepath)
                 task.image_path = f"assets/uploads/{filename}"
         
         if not task.name:
@@ -116,7 +267,7 @@ def edit_task(task_id: int):
         return redirect(url_for("index"))
     
     allowed_groups = get_allowed_groups()
-    status = get_scheduler_status()
+    status = cached_scheduler_status()
     
     if request.method == "POST":
         task.name = request.form.get("name", "").strip()
@@ -138,7 +289,7 @@ def edit_task(task_id: int):
             if file and file.filename:
                 filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
                 filepath = UPLOAD_FOLDER / filename
-                file.save(str(filepath))
+                save_upload(file, filepath)
                 task.image_path = f"assets/uploads/{filename}"
         
         # 如果选择清除图片
@@ -214,10 +365,8 @@ def run_task(task_id: int):
     
     task = db.get_task(task_id)
     if task:
-        # 异步执行（避免阻塞），immediate=True 跳过队列直接发送
-        import threading
-        thread = threading.Thread(target=execute_task, args=(task_id, True))
-        thread.start()
+        # 提交到线程池异步执行（避免阻塞），immediate=True 跳过队列直接发送
+        RUN_POOL.submit(execute_task, task_id, True)
         flash(f"任务 '{task.name}' 正在立即执行（跳过队列）", "info")
     return redirect(url_for("index"))
 
@@ -226,17 +375,23 @@ def run_task(task_id: int):
 def logs():
     """执行日志页面"""
     page_logs = db.get_logs(limit=100)
-    status = get_scheduler_status()
+    status = cached_scheduler_status()
     return render_template("logs.html", logs=page_logs, status=status)
 
 
+@app.route("/uploads/<path:fn>")
+def uploaded_file(fn):
+    """上传的图片（支持 ETag / 304 协商缓存，浏览器缓存一天）"""
+    return send_from_directory(UPLOAD_FOLDER, fn, conditional=True, etag=True, max_age=86400)
+
+
 # ========== API 路由 ==========
 
 @app.route("/api/status")
 def api_status():
     """获取调度器状态"""
-    status = get_scheduler_status()
-    status["next_run"] = status["next_run"].isoformat() if status["next_run"] else None
+    status = dict(cached_scheduler_status())
+    status["next_run"] = status["next_run"].isoformat() if status.get("next_run") else None
     return jsonify(status)
 
 
@@ -272,7 +427,7 @@ def api_reload_scheduler():
 @app.route("/queue")
 def queue_page():
     """发送队列页面"""
-    status = get_scheduler_status()
+    status = cached_scheduler_status()
     return render_template("queue.html", status=status)
 
 
@@ -281,13 +436,14 @@ def api_queue():
     """获取发送队列"""
     from src.core.send_queue import get_send_queue
     
-    include_completed = request.args.get("include_completed", "false").lower() == "true"
     queue = get_send_queue()
+    include_completed = request.args.get("include_completed", "false").lower() == "true"
+    limit = request.args.get("limit", type=int)
+    pending_count = queue.get_pending_count()
     # 确保执行器正在运行（如果有待处理的任务）
-    if queue.get_pending_count() > 0:
+    if pending_count > 0:
         queue.ensure_executor_running()
-    actions = queue.get_queue(include_completed=include_completed)
-    pending_count = queue.get_pending_count()
+    actions = queue.get_queue(include_completed=include_completed, limit=limit)
     
     return jsonify({
         "actions": actions,
@@ -317,52 +473,75 @@ def api_clear_completed():
 
 # ========== 模板过滤器 ==========
 
+@lru_cache(maxsize=2048)
+def _format_datetime_str(value: str) -> str:
+    """格式化 ISO 时间字符串（同一页面中重复的时间戳只解析一次）"""
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return value
+
+
 @app.template_filter("format_datetime")
 def format_datetime(value):
     """格式化日期时间"""
     if not value:
         return ""
+    if isinstance(value, str):
+        return _format_datetime_str(value)
     try:
-        if isinstance(value, str):
-            dt = datetime.fromisoformat(value)
-        else:
-            dt = value
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
     except:
         return value
 
 
+_CRON_RE = re.compile(r"^(every|daily|weekly|monthly) (.*)$", re.S)
+_INTERVAL_UNITS = {"m": "分钟", "h": "小时", "s": "秒"}
+_DAY_NAMES = ["周日", "周一", "周二", "周三", "周四", "周五", "周六"]
+
+
+def _fmt_every(rest: str) -> str:
+    # 间隔格式
+    interval_part = rest.strip()
+    unit = _INTERVAL_UNITS.get(interval_part[-1:])
+    if unit:
+        return f"每 {interval_part[:-1]} {unit}"
+    return f"每 {interval_part}"
+
+
+def _fmt_weekly(rest: str) -> str:
+    parts = rest.split()
+    return f"每{_DAY_NAMES[int(parts[0])]} {parts[1]}"
+
+
+def _fmt_monthly(rest: str) -> str:
+    parts = rest.split()
+    return f"每月 {parts[0]} 日 {parts[1]}"
+
+
+_CRON_HANDLERS = {
+    "every": _fmt_every,
+    "daily": lambda rest: f"每天 {rest}",
+    "weekly": _fmt_weekly,
+    "monthly": _fmt_monthly,
+}
+
+
+@lru_cache(maxsize=256)
+def _format_cron_cached(expr: str) -> str:
+    expr = expr.strip().lower()
+    m = _CRON_RE.match(expr)
+    if m is None:
+        return f"Cron: {expr}"
+    return _CRON_HANDLERS[m.group(1)](m.group(2))
+
+
 @app.template_filter("format_cron")
 def format_cron(expr):
-    """格式化调度表达式为可读文本"""
+    """格式化调度表达式为可读文本（同一表达式只解析一次）"""
     if not expr:
         return ""
-    
-    expr = expr.strip().lower()
-    
-    # 间隔格式
-    if expr.startswith("every "):
-        interval_part = expr[6:].strip()
-        if interval_part.endswith("m"):
-            return f"每 {interval_part[:-1]} 分钟"
-        elif interval_part.endswith("h"):
-            return f"每 {interval_part[:-1]} 小时"
-        elif interval_part.endswith("s"):
-            return f"每 {interval_part[:-1]} 秒"
-        return f"每 {interval_part}"
-    
-    if expr.startswith("daily "):
-        return f"每天 {expr[6:]}"
-    elif expr.startswith("weekly "):
-        parts = expr[7:].split()
-        day_names = ["周日", "周一", "周二", "周三", "周四", "周五", "周六"]
-        day = int(parts[0])
-        return f"每{day_names[day]} {parts[1]}"
-    elif expr.startswith("monthly "):
-        parts = expr[8:].split()
-        return f"每月 {parts[0]} 日 {parts[1]}"
-    else:
-        return f"Cron: {expr}"
+    return _format_cron_cached(expr)
 
 
 @app.template_filter("to_json")
@@ -374,6 +553,37 @@ def to_json_filter(value):
         return []
 
 
+# ========== 任务行渲染缓存 ==========
+
+# 已渲染的任务行（LRU）：{(URL 根, 任务 id, updated_at, 是否启用立即执行): HTML}
+# 行内链接由 url_for 生成，依赖请求的 URL 根，因此一并作为缓存键；
+# 任务的增删改和启停都会刷新 updated_at，缓存键随之变化，无需主动失效
+_TASK_ROW_CACHE: "OrderedDict[tuple, Markup]" = OrderedDict()
+_TASK_ROW_CACHE_LOCK = threading.Lock()
+TASK_ROW_CACHE_SIZE = 512
+
+
+@app.template_global()
+def render_task_row(task, immediate_run_enabled: bool) -> Markup:
+    """渲染首页任务列表中的一行（内容未变化时直接返回缓存）"""
+    key = (request.url_root, task.id, task.updated_at, bool(immediate_run_enabled))
+    with _TASK_ROW_CACHE_LOCK:
+        html = _TASK_ROW_CACHE.get(key)
+        if html is not None:
+            _TASK_ROW_CACHE.move_to_end(key)
+            return html
+    
+    # 渲染在锁外进行；并发渲染同一行时结果相同，后写入的覆盖即可
+    html = Markup(render_template("_task_row.html", task=task,
+                                  immediate_run_enabled=immediate_run_enabled))
+    with _TASK_ROW_CACHE_LOCK:
+        _TASK_ROW_CACHE[key] = html
+        _TASK_ROW_CACHE.move_to_end(key)
+        while len(_TASK_ROW_CACHE) > TASK_ROW_CACHE_SIZE:
+            _TASK_ROW_CACHE.popitem(last=False)
+    return html
+
+
 # ========== 启动入口 ==========
 
 def create_app():
@@ -385,14 +595,36 @@ def create_app():
     except Exception as e:
         print(f"[警告] 从 JSON 文件同步任务失败: {e}")
     
+    # 部署在 nginx 等前置服务器之后时，文件传输交给前置服务器（X-Sendfile）
+    if os.environ.get("USE_XSENDFILE"):
+        app.use_x_sendfile = True
+    
     # 初始化调度器
     init_scheduler()
     start_scheduler()
     return app
 
 
+def run_server(app, host: str = "0.0.0.0", port: int = 5000, dev: bool = False):
+    """
+    启动 Web 服务
+    
+    默认使用 waitress 多线程 WSGI 服务器，慢请求不会阻塞其它请求；
+    dev=True 或未安装 waitress 时使用 Flask 自带的开发服务器（调试模式）。
+    """
+    if not dev:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("[警告] 未安装 waitress，使用 Flask 开发服务器")
+        else:
+            serve(app, host=host, port=port, threads=SERVER_THREADS, channel_timeout=60)
+            return
+    app.run(host=host, port=port, debug=True, use_reloader=False, threaded=True)
+
+
 if __name__ == "__main__":
     app = create_app()
-    # 允许远程访问，端口 5000
-    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
+    # 允许远程访问，端口 5000；--dev 使用开发服务器
+    run_server(app, dev="--dev" in sys.argv)
 
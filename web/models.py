@@ -1,10 +1,45 @@
 """数据模型 - 任务配置和执行日志"""
+import atexit
+import hashlib
 import json
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+from dataclasses import dataclass, asdict, field, replace
+
+from src.core.log import Logger
+
+try:
+    import orjson
+except ImportError:  # 未安装时回退到标准库 json
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+    
+    def _json_dumps_pretty(obj) -> bytes:
+        """缩进 2 格的 UTF-8 JSON（用于 tasks.json）"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+    
+    def _json_dumps_pretty(obj) -> bytes:
+        """缩进 2 格的 UTF-8 JSON（用于 tasks.json）"""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+log = Logger("models")
 
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -15,6 +50,20 @@ TASKS_JSON_PATH = PROJECT_ROOT / "tasks.json"
 # 数据库路径（用于执行日志，不通过 Git 同步）
 DB_PATH = PROJECT_ROOT / "output" / "scheduler.db"
 
+# 执行日志由后台线程批量写入：每次取出队列中已有的日志（最多 LOG_BATCH_MAX 条）一次提交
+LOG_BATCH_MAX = 100
+# 读取日志前等待已入队日志写完的最长时间（秒）
+LOG_FLUSH_TIMEOUT = 5.0
+
+# tasks.json 延迟写入：连续多次修改只在最后一次修改后 JSON_SAVE_DELAY 秒写一次文件
+JSON_SAVE_DELAY = 0.5
+
+# 数据库结构版本（记录在 PRAGMA user_version 中，修改表结构/索引时递增）
+SCHEMA_VERSION = 2
+
+# 查询结果每批取出的行数
+FETCH_ARRAYSIZE = 64
+
 
 @dataclass
 class ScheduledTask:
@@ -29,17 +78,30 @@ class ScheduledTask:
     random_delay_minutes: Optional[int] = None  # 随机延时（分钟），None 表示使用配置文件的默认值
     created_at: str = ""
     updated_at: str = ""
+    # 已解析的群组列表及其对应的 groups 字符串；groups 被重新赋值后对象不同，下次读取时重新解析
+    _groups_list: Optional[List[str]] = field(default=None, init=False, repr=False, compare=False)
+    _groups_src: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def get_groups_list(self) -> List[str]:
-        """获取群组列表"""
-        try:
-            return json.loads(self.groups)
-        except:
-            return []
+        """
+        获取群组列表（groups 未重新赋值时只解析一次 JSON）
+        
+        返回的列表为实例内的缓存，调用方不应修改；需要改动时复制后经 set_groups_list 写回。
+        """
+        groups = self.groups
+        if self._groups_src is not groups:
+            try:
+                self._groups_list = _json_loads(groups)
+            except:
+                self._groups_list = []
+            self._groups_src = groups
+        return self._groups_list
     
     def set_groups_list(self, groups: List[str]):
         """设置群组列表"""
-        self.groups = json.dumps(groups, ensure_ascii=False)
+        self.groups = _json_dumps(groups)
+        self._groups_list = list(groups)
+        self._groups_src = self.groups
 
 
 @dataclass
@@ -53,85 +115,243 @@ class ExecutionLog:
     executed_at: str = ""
 
 
+# 按 dataclass 字段顺序显式列出查询列（旧库中 random_delay_minutes 是后加的列，物理顺序不同）
+_TASK_COLUMNS = "id, name, groups, text, image_path, cron_expression, enabled, random_delay_minutes, created_at, updated_at"
+_LOG_COLUMNS = "id, task_id, task_name, status, message, executed_at"
+_SQL_INSERT_LOG = """
+    INSERT INTO execution_logs (task_id, task_name, status, message, executed_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def _task_row_factory(cursor: sqlite3.Cursor, row: tuple) -> ScheduledTask:
+    """行直接按位置构造 ScheduledTask，省去 Row -> dict -> 关键字参数的转换"""
+    return ScheduledTask(*row)
+
+
+def _log_row_factory(cursor: sqlite3.Cursor, row: tuple) -> ExecutionLog:
+    return ExecutionLog(*row)
+
+
+# 最近一次生成的秒级时间戳：(整数秒, ISO 字符串)，整体替换保证两者一致
+_last_ts = (0, "")
+
+
+def _now_iso() -> str:
+    """当前时间的秒级 ISO 字符串（同一秒内复用，用于执行日志）"""
+    global _last_ts
+    sec = int(time.time())
+    cached = _last_ts
+    if sec == cached[0]:
+        return cached[1]
+    ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
+    _last_ts = (sec, ts)
+    return ts
+
+
+def _fetch_batched(cursor: sqlite3.Cursor) -> list:
+    """按 FETCH_ARRAYSIZE 分批取出所有行（行工厂已直接构造 dataclass）"""
+    cursor.arraysize = FETCH_ARRAYSIZE
+    out = []
+    while (batch := cursor.fetchmany()):
+        out.extend(batch)
+    return out
+
+
 class Database:
     """数据库操作类"""
     
     def __init__(self, db_path: Path = DB_PATH):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 每个线程一个长连接（Flask 请求线程、调度器线程各自复用）
+        self._tls = threading.local()
+        # 待写入的执行日志队列（元素为 (序号, 行)），由后台写入线程按序消费
+        self._log_queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._log_cv = threading.Condition()
+        self._log_seq = 0        # 最后入队的日志序号
+        self._log_done_seq = 0   # 已处理（写入或确认失败）的最大序号
+        # 任务内存索引（{任务 id: 任务}），供写 tasks.json 使用，首次使用时从数据库加载
+        self._tasks_cache: Optional[Dict[int, ScheduledTask]] = None
+        self._tasks_lock = threading.RLock()  # 保存 tasks.json 时持锁读取内存索引，需可重入
+        self._json_timer: Optional[threading.Timer] = None
+        self._last_json_hash: Optional[bytes] = None  # 最近一次写入 tasks.json 的内容摘要
         self._init_db()
+        threading.Thread(target=self._log_writer_loop, name="log-writer", daemon=True).start()
+        atexit.register(self._flush_logs)
+        atexit.register(self._flush_tasks_json)
     
     def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        获取当前线程的数据库连接（首次调用时创建并设置 PRAGMA）
+        
+        连接常驻不关闭，工作在自动提交模式：单条语句即时生效，
+        多条写入用 `_transaction()` 包成一个显式事务。
+        """
+        conn = getattr(self._tls, "conn", None)
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        # 不设置 row_factory：查询在游标上使用按位置构造 dataclass 的行工厂，其余语句用普通元组即可
+        # 连接级设置：WAL 下 NORMAL 同步已足够安全，提交时无需等待日志刷盘
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-64000")
+        # 其它线程持有写锁时等待最多 5 秒，而不是立即报 database is locked
+        conn.execute("PRAGMA busy_timeout=5000")
+        self._tls.conn = conn
         return conn
     
-    def _init_db(self):
-        """初始化数据库表"""
-        with self._get_conn() as conn:
-            # 任务表
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS scheduled_tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    groups TEXT NOT NULL DEFAULT '[]',
-                    text TEXT NOT NULL DEFAULT '',
-                    image_path TEXT DEFAULT '',
-                    cron_expression TEXT NOT NULL,
-                    enabled INTEGER DEFAULT 1,
-                    random_delay_minutes INTEGER DEFAULT NULL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-            """)
-            
-            # 添加新列（如果不存在）
-            try:
-                conn.execute("ALTER TABLE scheduled_tasks ADD COLUMN random_delay_minutes INTEGER DEFAULT NULL")
-                conn.commit()
-            except sqlite3.OperationalError:
-                # 列已存在，忽略错误
-                pass
-            
-            # 执行日志表
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS execution_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task_id INTEGER NOT NULL,
-                    task_name TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    message TEXT DEFAULT '',
-                    executed_at TEXT NOT NULL
-                )
-            """)
+    @contextmanager
+    def _transaction(self):
+        """显式事务：块内的多次写入只提交一次，异常时整体回滚（嵌套时并入外层事务）"""
+        conn = self._get_conn()
+        if getattr(self._tls, "in_tx", False):
+            yield conn
+            return
+        
+        conn.execute("BEGIN IMMEDIATE")
+        self._tls.in_tx = True
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
             conn.commit()
+        finally:
+            self._tls.in_tx = False
+    
+    def _init_db(self):
+        """初始化数据库表（PRAGMA user_version 已是当前版本时直接返回，不执行任何 DDL）"""
+        conn = self._get_conn()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        # WAL 模式持久保存在数据库文件中，设置一次即可；读写可并发（Web 读、调度器写）
+        conn.execute("PRAGMA journal_mode=WAL")
+        
+        # 任务表
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                groups TEXT NOT NULL DEFAULT '[]',
+                text TEXT NOT NULL DEFAULT '',
+                image_path TEXT DEFAULT '',
+                cron_expression TEXT NOT NULL,
+                enabled INTEGER DEFAULT 1,
+                random_delay_minutes INTEGER DEFAULT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        # 添加新列（旧库中不存在时）
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_tasks)")}
+        if "random_delay_minutes" not in columns:
+            conn.execute("ALTER TABLE scheduled_tasks ADD COLUMN random_delay_minutes INTEGER DEFAULT NULL")
+        
+        # 执行日志表
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS execution_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL,
+                task_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT DEFAULT '',
+                executed_at TEXT NOT NULL
+            )
+        """)
+        
+        # 索引：按任务查日志（WHERE task_id=? ORDER BY id DESC）、查启用任务
+        # get_logs 按 id（即 rowid）倒序，主键本身有序，无需额外索引
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_task_id ON execution_logs(task_id, id DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_enabled ON scheduled_tasks(enabled) WHERE enabled = 1")
+        
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
     # ========== JSON 文件同步 ==========
     
+    def _cache_put(self, task: ScheduledTask):
+        """写入/替换任务内存索引中的一项（保存副本，避免调用方后续修改影响缓存）"""
+        with self._tasks_lock:
+            if self._tasks_cache is not None:
+                self._tasks_cache[task.id] = replace(task)
+    
+    def _cache_pop(self, task_id: int):
+        with self._tasks_lock:
+            if self._tasks_cache is not None:
+                self._tasks_cache.pop(task_id, None)
+    
+    def _cache_invalidate(self):
+        """批量修改后丢弃内存索引，下次使用时重新加载"""
+        with self._tasks_lock:
+            self._tasks_cache = None
+    
+    def _cached_tasks(self) -> List[ScheduledTask]:
+        """内存索引中的所有任务（按 id 倒序，与 get_all_tasks 一致）"""
+        with self._tasks_lock:
+            if self._tasks_cache is None:
+                self._tasks_cache = {task.id: task for task in self.get_all_tasks()}
+            return sorted(self._tasks_cache.values(), key=lambda t: t.id, reverse=True)
+    
+    def _schedule_json_save(self):
+        """延迟保存 tasks.json（合并短时间内的多次修改）"""
+        with self._tasks_lock:
+            if self._json_timer is not None:
+                self._json_timer.cancel()
+            self._json_timer = threading.Timer(JSON_SAVE_DELAY, self._flush_tasks_json)
+            self._json_timer.daemon = True
+            self._json_timer.start()
+    
+    def _flush_tasks_json(self):
+        """立即写入待保存的 tasks.json"""
+        with self._tasks_lock:
+            timer, self._json_timer = self._json_timer, None
+        if timer is not None:
+            timer.cancel()
+            self._save_tasks_to_json()
+    
     def _save_tasks_to_json(self):
-        """保存所有任务到 JSON 文件"""
-        try:
-            tasks = self.get_all_tasks()
-            # 转换为字典列表，移除 id（JSON 中不需要，数据库会自动生成）
-            tasks_data = []
-            for task in tasks:
-                task_dict = {
-                    "name": task.name,
-                    "groups": task.get_groups_list(),  # 转换为列表
-                    "text": task.text,
-                    "image_path": task.image_path,
-                    "cron_expression": task.cron_expression,
-                    "enabled": task.enabled,
-                    "random_delay_minutes": task.random_delay_minutes,
-                }
-                tasks_data.append(task_dict)
-            
-            # 保存到 JSON 文件
-            with open(TASKS_JSON_PATH, "w", encoding="utf-8") as f:
-                json.dump({"tasks": tasks_data}, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            # JSON 保存失败不应该影响数据库操作
-            print(f"[警告] 保存任务到 JSON 文件失败: {e}")
+        """保存所有任务到 JSON 文件（数据来自内存索引，不查询数据库）"""
+        # 防抖定时器线程与退出/显式刷新可能同时保存：快照、摘要比较、写盘和记录摘要整体持锁
+        with self._tasks_lock:
+            try:
+                tasks = self._cached_tasks()
+                # 转换为字典列表，移除 id（JSON 中不需要，数据库会自动生成）
+                tasks_data = []
+                for task in tasks:
+                    task_dict = {
+                        "name": task.name,
+                        "groups": task.get_groups_list(),  # 转换为列表
+                        "text": task.text,
+                        "image_path": task.image_path,
+                        "cron_expression": task.cron_expression,
+                        "enabled": int(task.enabled),
+                        "random_delay_minutes": task.random_delay_minutes,
+                    }
+                    tasks_data.append(task_dict)
+                
+                payload = _json_dumps_pretty({"tasks": tasks_data})
+                
+                # 内容与文件中的一致时不写盘（首次比较时读取现有文件）
+                digest = hashlib.blake2b(payload, digest_size=16).digest()
+                if self._last_json_hash is None and TASKS_JSON_PATH.exists():
+                    self._last_json_hash = hashlib.blake2b(TASKS_JSON_PATH.read_bytes(), digest_size=16).digest()
+                if digest == self._last_json_hash:
+                    return
+                
+                # 先写临时文件再替换，读取方不会看到写了一半的文件
+                tmp_path = TASKS_JSON_PATH.with_suffix(".json.tmp")
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, TASKS_JSON_PATH)
+                self._last_json_hash = digest
+            except Exception as e:
+                # JSON 保存失败不应该影响数据库操作
+                print(f"[警告] 保存任务到 JSON 文件失败: {e}")
     
     def _load_tasks_from_json(self) -> List[dict]:
         """从 JSON 文件加载任务配置"""
@@ -139,9 +359,8 @@ class Database:
             return []
         
         try:
-            with open(TASKS_JSON_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("tasks", [])
+            data = _json_loads(TASKS_JSON_PATH.read_bytes())
+            return data.get("tasks", [])
         except Exception as e:
             print(f"[警告] 从 JSON 文件加载任务失败: {e}")
             return []
@@ -156,6 +375,10 @@ class Database:
         # 创建任务名称到任务的映射
         db_tasks_by_name = {task.name: task for task in db_tasks}
         
+        now = datetime.now().isoformat()
+        updates: List[tuple] = []
+        new_tasks: List[ScheduledTask] = []
+        
         # 同步 JSON 中的任务到数据库
         for json_task in json_tasks:
             task_name = json_task.get("name", "")
@@ -175,33 +398,24 @@ class Database:
             
             # 如果数据库中存在同名任务，更新它；否则创建新任务
             if task_name in db_tasks_by_name:
-                # 更新现有任务
+                # 更新现有任务（只更新数据库，不更新 JSON，避免循环）
                 existing_task = db_tasks_by_name[task_name]
-                task.id = existing_task.id
-                task.created_at = existing_task.created_at
-                # 只更新数据库，不更新 JSON（避免循环）
-                task.updated_at = datetime.now().isoformat()
-                with self._get_conn() as conn:
-                    conn.execute("""
-                        UPDATE scheduled_tasks 
-                        SET groups=?, text=?, image_path=?, cron_expression=?, enabled=?, random_delay_minutes=?, updated_at=?
-                        WHERE id=?
-                    """, (task.groups, task.text, task.image_path,
-                          task.cron_expression, int(task.enabled), task.random_delay_minutes, task.updated_at, task.id))
-                    conn.commit()
+                updates.append((task.groups, task.text, task.image_path, task.cron_expression,
+                                int(task.enabled), task.random_delay_minutes, now, existing_task.id))
             else:
-                # 创建新任务
-                now = datetime.now().isoformat()
-                task.created_at = now
-                task.updated_at = now
-                with self._get_conn() as conn:
-                    cursor = conn.execute("""
-                        INSERT INTO scheduled_tasks 
-                        (name, groups, text, image_path, cron_expression, enabled, random_delay_minutes, created_at, updated_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (task.name, task.groups, task.text, task.image_path, 
-                          task.cron_expression, int(task.enabled), task.random_delay_minutes, task.created_at, task.updated_at))
-                    conn.commit()
+                new_tasks.append(task)
+        
+        # 更新和新增在同一个事务内完成，只提交一次
+        with self._transaction() as conn:
+            if updates:
+                conn.executemany("""
+                    UPDATE scheduled_tasks 
+                    SET groups=?, text=?, image_path=?, cron_expression=?, enabled=?, random_delay_minutes=?, updated_at=?
+                    WHERE id=?
+                """, updates)
+            if new_tasks:
+                self.create_tasks_bulk(new_tasks, save_json=False)
+        self._cache_invalidate()
         
         # 删除 JSON 中不存在但数据库存在的任务（可选，这里不自动删除，保留手动创建的任务）
     
@@ -209,27 +423,30 @@ class Database:
     
     def get_all_tasks(self) -> List[ScheduledTask]:
         """获取所有任务"""
-        with self._get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM scheduled_tasks ORDER BY id DESC"
-            ).fetchall()
-            return [ScheduledTask(**dict(row)) for row in rows]
+        conn = self._get_conn()
+        cursor = conn.cursor()
+        cursor.row_factory = _task_row_factory
+        cursor.execute(
+            f"SELECT {_TASK_COLUMNS} FROM scheduled_tasks ORDER BY id DESC"
+        )
+        return _fetch_batched(cursor)
     
     def get_task(self, task_id: int) -> Optional[ScheduledTask]:
         """获取单个任务"""
-        with self._get_conn() as conn:
-            row = conn.execute(
-                "SELECT * FROM scheduled_tasks WHERE id = ?", (task_id,)
-            ).fetchone()
-            return ScheduledTask(**dict(row)) if row else None
+        cursor = self._get_conn().cursor()
+        cursor.row_factory = _task_row_factory
+        return cursor.execute(
+            f"SELECT {_TASK_COLUMNS} FROM scheduled_tasks WHERE id = ?", (task_id,)
+        ).fetchone()
     
     def get_enabled_tasks(self) -> List[ScheduledTask]:
         """获取所有启用的任务"""
-        with self._get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM scheduled_tasks WHERE enabled = 1"
-            ).fetchall()
-            return [ScheduledTask(**dict(row)) for row in rows]
+        cursor = self._get_conn().cursor()
+        cursor.row_factory = _task_row_factory
+        cursor.execute(
+            f"SELECT {_TASK_COLUMNS} FROM scheduled_tasks WHERE enabled = 1"
+        )
+        return _fetch_batched(cursor)
     
     def create_task(self, task: ScheduledTask) -> int:
         """创建任务"""
@@ -237,86 +454,173 @@ class Database:
         task.created_at = now
         task.updated_at = now
         
-        with self._get_conn() as conn:
-            cursor = conn.execute("""
+        conn = self._get_conn()
+        cursor = conn.execute("""
+            INSERT INTO scheduled_tasks 
+            (name, groups, text, image_path, cron_expression, enabled, random_delay_minutes, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (task.name, task.groups, task.text, task.image_path, 
+              task.cron_expression, int(task.enabled), task.random_delay_minutes, task.created_at, task.updated_at))
+        task.id = cursor.lastrowid
+        
+        # 同步更新 JSON 文件
+        self._cache_put(task)
+        self._schedule_json_save()
+        return task.id
+    
+    def create_tasks_bulk(self, tasks: List[ScheduledTask], save_json: bool = True):
+        """批量创建任务（一个事务内 executemany，只提交一次）"""
+        if not tasks:
+            return
+        now = datetime.now().isoformat()
+        rows = []
+        for task in tasks:
+            task.created_at = now
+            task.updated_at = now
+            rows.append((task.name, task.groups, task.text, task.image_path,
+                         task.cron_expression, int(task.enabled), task.random_delay_minutes, now, now))
+        
+        with self._transaction() as conn:
+            conn.executemany("""
                 INSERT INTO scheduled_tasks 
                 (name, groups, text, image_path, cron_expression, enabled, random_delay_minutes, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (task.name, task.groups, task.text, task.image_path, 
-                  task.cron_expression, int(task.enabled), task.random_delay_minutes, task.created_at, task.updated_at))
-            conn.commit()
-            task.id = cursor.lastrowid
+            """, rows)
         
-        # 同步更新 JSON 文件
-        self._save_tasks_to_json()
-        return task.id
+        self._cache_invalidate()
+        if save_json:
+            self._schedule_json_save()
     
     def update_task(self, task: ScheduledTask):
         """更新任务"""
         task.updated_at = datetime.now().isoformat()
         
-        with self._get_conn() as conn:
-            conn.execute("""
-                UPDATE scheduled_tasks 
-                SET name=?, groups=?, text=?, image_path=?, cron_expression=?, enabled=?, random_delay_minutes=?, updated_at=?
-                WHERE id=?
-            """, (task.name, task.groups, task.text, task.image_path,
-                  task.cron_expression, int(task.enabled), task.random_delay_minutes, task.updated_at, task.id))
-            conn.commit()
+        conn = self._get_conn()
+        conn.execute("""
+            UPDATE scheduled_tasks 
+            SET name=?, groups=?, text=?, image_path=?, cron_expression=?, enabled=?, random_delay_minutes=?, updated_at=?
+            WHERE id=?
+        """, (task.name, task.groups, task.text, task.image_path,
+              task.cron_expression, int(task.enabled), task.random_delay_minutes, task.updated_at, task.id))
         
         # 同步更新 JSON 文件
-        self._save_tasks_to_json()
+        self._cache_put(task)
+        self._schedule_json_save()
     
     def delete_task(self, task_id: int):
         """删除任务"""
-        with self._get_conn() as conn:
-            conn.execute("DELETE FROM scheduled_tasks WHERE id = ?", (task_id,))
-            conn.commit()
+        conn = self._get_conn()
+        conn.execute("DELETE FROM scheduled_tasks WHERE id = ?", (task_id,))
         
         # 同步更新 JSON 文件
-        self._save_tasks_to_json()
+        self._cache_pop(task_id)
+        self._schedule_json_save()
     
     def toggle_task(self, task_id: int, enabled: bool):
         """启用/禁用任务"""
-        with self._get_conn() as conn:
-            conn.execute(
-                "UPDATE scheduled_tasks SET enabled=?, updated_at=? WHERE id=?",
-                (int(enabled), datetime.now().isoformat(), task_id)
-            )
-            conn.commit()
+        updated_at = datetime.now().isoformat()
+        conn = self._get_conn()
+        conn.execute(
+            "UPDATE scheduled_tasks SET enabled=?, updated_at=? WHERE id=?",
+            (int(enabled), updated_at, task_id)
+        )
         
         # 同步更新 JSON 文件
-        self._save_tasks_to_json()
+        with self._tasks_lock:
+            cached = self._tasks_cache.get(task_id) if self._tasks_cache is not None else None
+            if cached is not None:
+                cached.enabled = int(enabled)
+                cached.updated_at = updated_at
+        self._schedule_json_save()
     
     # ========== 日志操作 ==========
     
     def add_log(self, log: ExecutionLog):
-        """添加执行日志"""
-        log.executed_at = datetime.now().isoformat()
+        """添加执行日志（放入队列后立即返回，由后台线程批量写入）"""
+        log.executed_at = _now_iso()  # 日志精确到秒即可；任务时间戳仍保留微秒（任务行缓存以 updated_at 为键）
+        row = (log.task_id, log.task_name, log.status, log.message, log.executed_at)
+        # 分配序号和入队在同一把锁内，保证队列顺序与序号一致
+        with self._log_cv:
+            self._log_seq += 1
+            self._log_queue.put((self._log_seq, row))
+    
+    def _log_writer_loop(self):
+        """后台写入线程：阻塞等待日志，取出当前积压的一批后一个事务写入"""
+        q = self._log_queue
+        while True:
+            batch = [q.get()]
+            try:
+                while len(batch) < LOG_BATCH_MAX:
+                    batch.append(q.get_nowait())
+            except queue.Empty:
+                pass
+            
+            try:
+                self._write_log_batch([row for _, row in batch])
+            finally:
+                with self._log_cv:
+                    self._log_done_seq = batch[-1][0]
+                    self._log_cv.notify_all()
+    
+    def _write_log_batch(self, rows: List[tuple]):
+        """写入一批日志：失败时整批重试一次，仍失败则逐条写入，只丢弃本身写不进去的行"""
+        for attempt in (1, 2):
+            try:
+                self._write_logs(rows)
+                return
+            except Exception as e:
+                log.warn("批量写入执行日志失败", attempt=attempt, rows=len(rows), error=str(e))
         
-        with self._get_conn() as conn:
-            conn.execute("""
-                INSERT INTO execution_logs (task_id, task_name, status, message, executed_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (log.task_id, log.task_name, log.status, log.message, log.executed_at))
-            conn.commit()
+        if len(rows) == 1:
+            log.error("执行日志写入失败，已丢弃", row=rows[0])
+            return
+        for row in rows:
+            try:
+                self._write_logs([row])
+            except Exception as e:
+                log.error("执行日志写入失败，已丢弃", row=row, error=str(e))
+    
+    def _flush_logs(self):
+        """
+        等待调用时已入队的日志处理完毕
+        
+        只等到调用时刻的序号，之后其它线程新入队的日志不会延长等待；
+        最多等待 LOG_FLUSH_TIMEOUT 秒，超时则读取到的日志可能略有滞后。
+        """
+        with self._log_cv:
+            target = self._log_seq
+            self._log_cv.wait_for(lambda: self._log_done_seq >= target, timeout=LOG_FLUSH_TIMEOUT)
+    
+    def _write_logs(self, batch: List[tuple]):
+        """写入一批日志：单条直接自动提交，多条放在一个事务内"""
+        if len(batch) == 1:
+            self._get_conn().execute(_SQL_INSERT_LOG, batch[0])
+            return
+        with self._transaction() as conn:
+            conn.executemany(_SQL_INSERT_LOG, batch)
     
     def get_logs(self, limit: int = 50) -> List[ExecutionLog]:
         """获取最近的执行日志"""
-        with self._get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM execution_logs ORDER BY id DESC LIMIT ?", (limit,)
-            ).fetchall()
-            return [ExecutionLog(**dict(row)) for row in rows]
+        self._flush_logs()  # 保证能读到刚写入的日志
+        conn = self._get_conn()
+        cursor = conn.cursor()
+        cursor.row_factory = _log_row_factory
+        cursor.execute(
+            f"SELECT {_LOG_COLUMNS} FROM execution_logs ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        return _fetch_batched(cursor)
     
     def get_task_logs(self, task_id: int, limit: int = 20) -> List[ExecutionLog]:
         """获取指定任务的执行日志"""
-        with self._get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM execution_logs WHERE task_id = ? ORDER BY id DESC LIMIT ?",
-                (task_id, limit)
-            ).fetchall()
-            return [ExecutionLog(**dict(row)) for row in rows]
+        self._flush_logs()
+        conn = self._get_conn()
+        cursor = conn.cursor()
+        cursor.row_factory = _log_row_factory
+        cursor.execute(
+            f"SELECT {_LOG_COLUMNS} FROM execution_logs WHERE task_id = ? ORDER BY id DESC LIMIT ?",
+            (task_id, limit)
+        )
+        return _fetch_batched(cursor)
 
 
 # 全局数据库实例
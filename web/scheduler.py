@@ -1,11 +1,16 @@
 """APScheduler 定时调度器"""
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_RUNNING
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -17,8 +22,36 @@ from src.core.log import Logger
 
 log = Logger("scheduler")
 
-# 全局调度器实例
+# 全局调度器实例（由 init_scheduler 在 _scheduler_lock 保护下创建）
 scheduler: Optional[BackgroundScheduler] = None
+_scheduler_lock = threading.Lock()
+
+# 手动/首次立即执行任务的线程池：复用工作线程，并限制同时执行的任务数
+RUN_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="task-run")
+
+# 复用的广播器：(构造时使用的配置字典, 广播器实例)
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def _get_broadcaster(config: dict):
+    """
+    获取广播器实例（配置未变化时复用）
+    
+    load_config() 在配置文件未修改时返回同一个字典对象，以对象身份判断配置是否变化；
+    复用实例可保留窗口句柄缓存和限频器状态，并省去每次读取发送延时文件。
+    实例会被多个任务线程同时使用，其可变状态（窗口缓存、连续失败计数）由广播器内部加锁保护。
+    """
+    global _broadcaster
+    from src.adapters.wechat_desktop import WeChatBroadcaster  # 延迟导入避免循环依赖
+    
+    with _broadcaster_lock:
+        cached = _broadcaster
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        broadcaster = WeChatBroadcaster(config)
+        _broadcaster = (config, broadcaster)
+        return broadcaster
 
 
 def execute_task(task_id: int, immediate: bool = False):
@@ -49,10 +82,7 @@ def execute_task(task_id: int, immediate: bool = False):
     )
     
     try:
-        # 导入执行器（延迟导入避免循环依赖）
-        from src.adapters.wechat_desktop import WeChatBroadcaster
-        
-        # 加载基础配置
+        # 加载基础配置（按文件修改时间缓存）
         config = load_config()
         
         # 获取任务配置
@@ -68,7 +98,7 @@ def execute_task(task_id: int, immediate: bool = False):
             image_path = None
         
         # 执行广播
-        broadcaster = WeChatBroadcaster(config)
+        broadcaster = _get_broadcaster(config)
         # 使用任务的随机延时（如果设置了），否则使用配置文件的默认值
         task_random_delay = task.random_delay_minutes
         stats = broadcaster.broadcast(groups, text, image_path, task_name=task.name, 
@@ -96,6 +126,63 @@ def execute_task(task_id: int, immediate: bool = False):
         log.info("=" * 50)
 
 
+# ---------- 简化格式解析（参数为关键字之后的部分）----------
+
+_INTERVAL_UNITS = {"m": "minutes", "h": "hours", "s": "seconds"}
+
+
+def _parse_every(rest: str, expr: str) -> tuple:
+    """every Nm/Nh/Ns"""
+    unit = _INTERVAL_UNITS.get(rest[-1:])
+    if unit is None:
+        raise ValueError(f"无效的间隔格式: {expr}，支持 s/m/h 后缀")
+    return ("interval", {unit: int(rest[:-1])})
+
+
+def _parse_daily(rest: str, expr: str) -> tuple:
+    """daily HH:MM"""
+    hour, minute = rest.split(":")
+    return ("cron", {"hour": int(hour), "minute": int(minute)})
+
+
+def _parse_weekly(rest: str, expr: str) -> tuple:
+    """weekly D HH:MM"""
+    parts = rest.split()
+    hour, minute = parts[1].split(":")
+    return ("cron", {"day_of_week": int(parts[0]), "hour": int(hour), "minute": int(minute)})
+
+
+def _parse_monthly(rest: str, expr: str) -> tuple:
+    """monthly D HH:MM"""
+    parts = rest.split()
+    hour, minute = parts[1].split(":")
+    return ("cron", {"day": int(parts[0]), "hour": int(hour), "minute": int(minute)})
+
+
+_CRON_PARSERS = {
+    "every": _parse_every,
+    "daily": _parse_daily,
+    "weekly": _parse_weekly,
+    "monthly": _parse_monthly,
+}
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(expr: str) -> tuple:
+    """解析已规范化（strip + lower）的表达式，返回 (trigger_type, 参数键值对元组)"""
+    keyword, _, rest = expr.partition(" ")
+    parser = _CRON_PARSERS.get(keyword)
+    if parser is not None and rest:
+        trigger_type, trigger_args = parser(rest.strip(), expr)
+        return (trigger_type, tuple(trigger_args.items()))
+    
+    # 标准 Cron 格式 (5 段)
+    parts = expr.split()
+    if len(parts) == 5:
+        return ("cron", tuple(zip(("minute", "hour", "day", "month", "day_of_week"), parts)))
+    raise ValueError(f"无效的调度表达式: {expr}")
+
+
 def parse_cron_expression(expr: str) -> tuple:
     """
     解析调度表达式
@@ -116,55 +203,17 @@ def parse_cron_expression(expr: str) -> tuple:
         - trigger_type: "cron" 或 "interval"
         - trigger_args: 传给触发器的参数字典
     """
-    expr = expr.strip().lower()
-    
-    # 间隔格式解析 (every Nm/Nh/Ns)
-    if expr.startswith("every "):
-        interval_part = expr[6:].strip()
-        
-        if interval_part.endswith("m"):
-            minutes = int(interval_part[:-1])
-            return ("interval", {"minutes": minutes})
-        elif interval_part.endswith("h"):
-            hours = int(interval_part[:-1])
-            return ("interval", {"hours": hours})
-        elif interval_part.endswith("s"):
-            seconds = int(interval_part[:-1])
-            return ("interval", {"seconds": seconds})
-        else:
-            raise ValueError(f"无效的间隔格式: {expr}，支持 s/m/h 后缀")
-    
-    # 简化格式解析
-    if expr.startswith("daily "):
-        time_part = expr[6:]
-        hour, minute = time_part.split(":")
-        return ("cron", {"hour": int(hour), "minute": int(minute)})
-    
-    elif expr.startswith("weekly "):
-        parts = expr[7:].split()
-        day_of_week = int(parts[0])
-        hour, minute = parts[1].split(":")
-        return ("cron", {"day_of_week": day_of_week, "hour": int(hour), "minute": int(minute)})
-    
-    elif expr.startswith("monthly "):
-        parts = expr[8:].split()
-        day = int(parts[0])
-        hour, minute = parts[1].split(":")
-        return ("cron", {"day": day, "hour": int(hour), "minute": int(minute)})
-    
-    # 标准 Cron 格式 (5 段)
-    else:
-        parts = expr.split()
-        if len(parts) == 5:
-            return ("cron", {
-                "minute": parts[0],
-                "hour": parts[1],
-                "day": parts[2],
-                "month": parts[3],
-                "day_of_week": parts[4]
-            })
-        else:
-            raise ValueError(f"无效的调度表达式: {expr}")
+    trigger_type, items = _parse_cached(expr.strip().lower())
+    # 每次返回新字典，调用方修改不会影响缓存
+    return (trigger_type, dict(items))
+
+
+def _build_trigger(task: ScheduledTask) -> tuple:
+    """根据任务的调度表达式构造触发器，返回 (trigger_type, trigger)"""
+    trigger_type, trigger_args = parse_cron_expression(task.cron_expression)
+    if trigger_type == "interval":
+        return trigger_type, IntervalTrigger(**trigger_args)
+    return trigger_type, CronTrigger(**trigger_args)
 
 
 def add_job_for_task(task: ScheduledTask, run_immediately: bool = False):
@@ -192,14 +241,7 @@ def add_job_for_task(task: ScheduledTask, run_immediately: bool = False):
         return
     
     try:
-        trigger_type, trigger_args = parse_cron_expression(task.cron_expression)
-        
-        # 根据类型创建触发器
-        if trigger_type == "interval":
-            from apscheduler.triggers.interval import IntervalTrigger
-            trigger = IntervalTrigger(**trigger_args)
-        else:
-            trigger = CronTrigger(**trigger_args)
+        trigger_type, trigger = _build_trigger(task)
         
         scheduler.add_job(
             execute_task,
@@ -214,9 +256,8 @@ def add_job_for_task(task: ScheduledTask, run_immediately: bool = False):
         
         # 对于 interval 类型，立即执行第一次
         if run_immediately and trigger_type == "interval":
-            import threading
             log.info("立即执行首次任务", task_id=task.id)
-            threading.Thread(target=execute_task, args=(task.id,), daemon=True).start()
+            RUN_POOL.submit(execute_task, task.id)
         
     except Exception as e:
         log.error("添加调度作业失败", task_id=task.id, error=str(e))
@@ -237,54 +278,78 @@ def remove_job_for_task(task_id: int):
 
 
 def reload_all_jobs():
-    """重新加载所有任务的调度作业"""
+    """重新加载所有任务的调度作业（期间暂停调度器，只唤醒一次）"""
     global scheduler
     if not scheduler:
         return
     
-    # 清除所有任务作业
-    for job in scheduler.get_jobs():
-        if job.id.startswith("task_"):
-            scheduler.remove_job(job.id)
+    # 先构造好所有触发器，表达式无效的任务只记录错误
+    triggers = []
+    for task in db.get_enabled_tasks():
+        try:
+            triggers.append((task, _build_trigger(task)[1]))
+        except Exception as e:
+            log.error("添加调度作业失败", task_id=task.id, error=str(e))
     
-    # 重新加载启用的任务
-    tasks = db.get_enabled_tasks()
-    for task in tasks:
-        add_job_for_task(task)
+    paused = scheduler.state == STATE_RUNNING
+    if paused:
+        scheduler.pause()
+    try:
+        # 清除所有任务作业
+        for job in scheduler.get_jobs():
+            if job.id.startswith("task_"):
+                scheduler.remove_job(job.id)
+        
+        # 重新加载启用的任务
+        for task, trigger in triggers:
+            scheduler.add_job(
+                execute_task,
+                trigger,
+                args=[task.id],
+                id=f"task_{task.id}",
+                name=task.name,
+                replace_existing=True
+            )
+    finally:
+        if paused:
+            scheduler.resume()
     
-    log.info(f"已重新加载 {len(tasks)} 个调度作业")
+    log.info(f"已重新加载 {len(triggers)} 个调度作业")
 
 
 def init_scheduler() -> BackgroundScheduler:
-    """初始化调度器"""
+    """初始化调度器（线程安全，进程内只创建一个实例）"""
     global scheduler
     
     if scheduler is not None:
         return scheduler
     
-    scheduler = BackgroundScheduler(
-        timezone="Asia/Shanghai",
-        job_defaults={
-            'coalesce': True,  # 合并错过的任务
-            'max_instances': 1  # 同一任务最多同时运行 1 个实例
-        }
-    )
-    
-    # 加载所有启用的任务
-    reload_all_jobs()
+    with _scheduler_lock:
+        # 双重检查：并发调用时只有第一个线程创建调度器并加载作业
+        if scheduler is not None:
+            return scheduler
+        
+        scheduler = BackgroundScheduler(
+            timezone="Asia/Shanghai",
+            job_defaults={
+                'coalesce': True,  # 合并错过的任务
+                'max_instances': 1  # 同一任务最多同时运行 1 个实例
+            }
+        )
+        
+        # 加载所有启用的任务
+        reload_all_jobs()
     
     return scheduler
 
 
 def start_scheduler():
     """启动调度器"""
-    global scheduler
-    if scheduler is None:
-        init_scheduler()
-    
-    if not scheduler.running:
-        scheduler.start()
-        log.info("调度器已启动")
+    sched = init_scheduler()
+    with _scheduler_lock:
+        if not sched.running:
+            sched.start()
+            log.info("调度器已启动")
 
 
 def stop_scheduler():
@@ -303,23 +368,21 @@ def get_scheduler_status() -> dict:
     
     jobs = scheduler.get_jobs()
     
-    # 获取下次运行时间（兼容不同版本的 APScheduler）
+    # 一次遍历统计任务作业数并取最早的下次运行时间
+    # 属性名只判断一次（兼容不同版本的 APScheduler）
+    next_attr = "next_run_time" if not jobs or hasattr(jobs[0], "next_run_time") else "next_fire_time"
+    count = 0
     next_run = None
-    try:
-        next_runs = []
-        for j in jobs:
-            # 尝试不同的属性名
-            nrt = getattr(j, 'next_run_time', None) or getattr(j, 'next_fire_time', None)
-            if nrt:
-                next_runs.append(nrt)
-        if next_runs:
-            next_run = min(next_runs)
-    except Exception:
-        pass
+    for j in jobs:
+        if j.id.startswith("task_"):
+            count += 1
+        nrt = getattr(j, next_attr, None)
+        if nrt is not None and (next_run is None or nrt < next_run):
+            next_run = nrt
     
     return {
         "running": scheduler.running,
-        "jobs": len([j for j in jobs if j.id.startswith("task_")]),
+        "jobs": count,
         "next_run": next_run
     }
 